@@ -1,8 +1,12 @@
 import itertools
+import weakref
 
 
 class Sentence():
 
+    # Set on the shared instances returned by `intern`
+    interned = False
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -15,6 +19,14 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def memo(self, key, compute):
+        """Returns `compute()`, cached if the sentence is interned."""
+        if not self.interned:
+            return compute()
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -75,10 +87,12 @@ class Not(Sentence):
         self.operand = operand
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self.memo("hash", lambda: hash(("not", hash(self.operand))))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -87,10 +101,12 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        return self.memo("formula", lambda: (
+            "¬" + Sentence.parenthesize(self.operand.formula())
+        ))
 
     def symbols(self):
-        return self.operand.symbols()
+        return set(self.memo("symbols", self.operand.symbols))
 
 
 class And(Sentence):
@@ -100,12 +116,14 @@ class And(Sentence):
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
-        return hash(
+        return self.memo("hash", lambda: hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        ))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,6 +132,8 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.interned:
+            raise Exception("cannot add to an interned sentence")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
@@ -123,11 +143,15 @@ class And(Sentence):
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+        return self.memo("formula", lambda: " ∧ ".join(
+            [Sentence.parenthesize(conjunct.formula())
+             for conjunct in self.conjuncts]
+        ))
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set(self.memo("symbols", lambda: set.union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )))
 
 
 class Or(Sentence):
@@ -137,12 +161,14 @@ class Or(Sentence):
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
     def __hash__(self):
-        return hash(
+        return self.memo("hash", lambda: hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        ))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -154,11 +180,15 @@ class Or(Sentence):
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+        return self.memo("formula", lambda: " ∨  ".join(
+            [Sentence.parenthesize(disjunct.formula())
+             for disjunct in self.disjuncts]
+        ))
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set(self.memo("symbols", lambda: set.union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )))
 
 
 class Implication(Sentence):
@@ -169,12 +199,16 @@ class Implication(Sentence):
         self.consequent = consequent
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (isinstance(other, Implication)
                 and self.antecedent == other.antecedent
                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self.memo("hash", lambda: hash(
+            ("implies", hash(self.antecedent), hash(self.consequent))
+        ))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -184,12 +218,16 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        def compute():
+            antecedent = Sentence.parenthesize(self.antecedent.formula())
+            consequent = Sentence.parenthesize(self.consequent.formula())
+            return f"{antecedent} => {consequent}"
+        return self.memo("formula", compute)
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set(self.memo("symbols", lambda: set.union(
+            self.antecedent.symbols(), self.consequent.symbols()
+        )))
 
 
 class Biconditional(Sentence):
@@ -200,12 +238,16 @@ class Biconditional(Sentence):
         self.right = right
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (isinstance(other, Biconditional)
                 and self.left == other.left
                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self.memo("hash", lambda: hash(
+            ("biconditional", hash(self.left), hash(self.right))
+        ))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,47 +259,587 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+        def compute():
+            left = Sentence.parenthesize(str(self.left))
+            right = Sentence.parenthesize(str(self.right))
+            return f"{left} <=> {right}"
+        return self.memo("formula", compute)
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+        return set(self.memo("symbols", lambda: set.union(
+            self.left.symbols(), self.right.symbols()
+        )))
+
+
+# Shared sentences, keyed by class and the identities of their operands
+interned_sentences = weakref.WeakValueDictionary()
+
+
+def intern(sentence):
+    """
+    Returns the shared instance of `sentence`. Structurally identical
+    sentences intern to the same object, which caches its hash, symbols
+    and formula, and can no longer be modified with `add`.
+    """
+    Sentence.validate(sentence)
+    if sentence.interned:
+        return sentence
+
+    # Build a canonical copy whose operands are themselves interned
+    if isinstance(sentence, Symbol):
+        key = ("symbol", sentence.name)
+        shared = Symbol(sentence.name)
+    elif isinstance(sentence, Not):
+        operand = intern(sentence.operand)
+        key = ("not", id(operand))
+        shared = Not(operand)
+    elif isinstance(sentence, (And, Or)):
+        cls = type(sentence)
+        operands = [intern(operand) for operand in (
+            sentence.conjuncts if cls is And else sentence.disjuncts
+        )]
+        key = (cls.__name__, tuple(id(operand) for operand in operands))
+        shared = cls(*operands)
+    elif isinstance(sentence, Implication):
+        antecedent = intern(sentence.antecedent)
+        consequent = intern(sentence.consequent)
+        key = ("implies", id(antecedent), id(consequent))
+        shared = Implication(antecedent, consequent)
+    elif isinstance(sentence, Biconditional):
+        left = intern(sentence.left)
+        right = intern(sentence.right)
+        key = ("biconditional", id(left), id(right))
+        shared = Biconditional(left, right)
+    else:
+        raise TypeError(f"cannot intern {sentence}")
+
+    existing = interned_sentences.get(key)
+    if existing is not None:
+        return existing
+    shared.interned = True
+    shared.cache = dict()
+    interned_sentences[key] = shared
+    return shared
+
+
+# Number of symbols enumerated together in one integer word by model_check,
+# so each call to a compiled sentence checks 2 ** BATCH_SYMBOLS models
+BATCH_SYMBOLS = 12
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Compiles `sentence` into a function `evaluate(columns, mask)`.
+    `columns[i]` is an integer whose bits are the values of `symbols[i]`
+    in a batch of models, and `mask` has one bit set per model, so the
+    result has a bit set for each model in which the sentence is true.
+    A single model is evaluated with 0/1 columns and a mask of 1.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    lines = []
+    names = dict()
+
+    def emit(sentence):
+        """Emits code for `sentence`, returning the name of its result."""
+        if sentence in names:
+            return names[sentence]
+        if isinstance(sentence, Symbol):
+            if sentence.name not in index:
+                raise Exception(f"variable {sentence.name} not in model")
+            expression = f"columns[{index[sentence.name]}]"
+        elif isinstance(sentence, Not):
+            expression = f"mask ^ {emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            operands = [emit(conjunct) for conjunct in sentence.conjuncts]
+            expression = " & ".join(operands) if operands else "mask"
+        elif isinstance(sentence, Or):
+            operands = [emit(disjunct) for disjunct in sentence.disjuncts]
+            expression = " | ".join(operands) if operands else "0"
+        elif isinstance(sentence, Implication):
+            antecedent = emit(sentence.antecedent)
+            consequent = emit(sentence.consequent)
+            expression = f"(mask ^ {antecedent}) | {consequent}"
+        elif isinstance(sentence, Biconditional):
+            left = emit(sentence.left)
+            right = emit(sentence.right)
+            expression = f"mask ^ {left} ^ {right}"
         else:
+            raise TypeError(f"cannot compile {sentence}")
+        name = f"t{len(lines)}"
+        lines.append(f"    {name} = {expression}")
+        names[sentence] = name
+        return name
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+    result = emit(sentence)
+    source = "def evaluate(columns, mask):\n"
+    source += "\n".join(lines) + f"\n    return {result}\n"
+    namespace = dict()
+    exec(source, namespace)
+    return namespace["evaluate"]
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    evaluate = compile_sentence(Implication(knowledge, query), symbols)
+
+    # The first symbols take every combination of values within one word
+    width = min(len(symbols), BATCH_SYMBOLS)
+    size = 1 << width
+    mask = (1 << size) - 1
+    columns = []
+    for i in range(width):
+        period = 2 << i
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        while period < size:
+            column |= column << period
+            period *= 2
+        columns.append(column)
+
+    # The remaining symbols are constant within a word
+    for batch in range(1 << (len(symbols) - width)):
+        model = columns + [
+            mask if (batch >> i) & 1 else 0
+            for i in range(len(symbols) - width)
+        ]
+
+        # If knowledge base is true in a model, query must also be true
+        if evaluate(model, mask) != mask:
+            return False
+    return True
+
+
+class CNF():
+
+    def __init__(self):
+        """
+        Initialize an empty conjunctive normal form encoding.
+            - `variables`: maps symbol names to positive integer variables
+            - `clauses`: list of clauses, each a list of integer literals
+              where `-v` is the negation of variable `v`
+        Compound sentences are given fresh variables (Tseitin encoding),
+        so the number of clauses grows linearly with the sentence size.
+        """
+        self.variables = dict()
+        self.clauses = []
+        self.num_vars = 0
+        self.literals = dict()
+        self.true = None
+
+    def new_var(self):
+        """Returns a fresh variable."""
+        self.num_vars += 1
+        return self.num_vars
+
+    def variable(self, name):
+        """Returns the variable for the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.new_var()
+        return self.variables[name]
+
+    def constant(self, value):
+        """Returns a literal that is always `value`."""
+        if self.true is None:
+            self.true = self.new_var()
+            self.clauses.append([self.true])
+        return self.true if value else -self.true
+
+    def add(self, sentence):
+        """Asserts that `sentence` is true."""
+        Sentence.validate(sentence)
+
+        # Top-level conjuncts can be asserted directly
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to `sentence`, adding definitions."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, (And, Or)):
+            operands = (sentence.conjuncts if isinstance(sentence, And)
+                        else sentence.disjuncts)
+            literals = [self.literal(operand) for operand in operands]
+            if not literals:
+                return self.constant(isinstance(sentence, And))
+            if len(literals) == 1:
+                return literals[0]
+
+            # And: x => each conjunct, and all conjuncts => x
+            # Or is the same encoding with every literal negated
+            sign = 1 if isinstance(sentence, And) else -1
+            x = self.new_var()
+            for lit in literals:
+                self.clauses.append([-sign * x, sign * lit])
+            self.clauses.append([sign * x] + [-sign * lit for lit in literals])
+
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            x = self.new_var()
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([x, a])
+            self.clauses.append([x, -b])
+
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            x = self.new_var()
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([-x, a, -b])
+            self.clauses.append([x, a, b])
+            self.clauses.append([x, -a, -b])
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        else:
+            raise TypeError(f"cannot encode {sentence}")
+
+        self.literals[sentence] = x
+        return x
+
+
+class Solver():
+
+    def __init__(self, clauses=()):
+        """
+        Initialize a CDCL satisfiability solver.
+        Each clause is a list of integer literals. Unit propagation uses
+        two watched literals per clause, and conflicts are analyzed to
+        learn a new clause and backjump.
+        """
+        self.clauses = []
+        self.watches = dict()
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.increment = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def grow(self, var):
+        """Makes room for variables up to `var`."""
+        while len(self.values) <= var:
+            self.values.append(None)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            v = len(self.values) - 1
+            self.watches[v] = []
+            self.watches[-v] = []
+
+    def value(self, lit):
+        """Returns the truth value of `lit`, or None if unassigned."""
+        value = self.values[abs(lit)]
+        if value is None:
+            return None
+        return value == (lit > 0)
+
+    def level(self):
+        """Returns the current decision level."""
+        return len(self.trail_lim)
+
+    def add_clause(self, clause):
+        """Adds a clause; returns False if the clauses are unsatisfiable."""
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        # Drop duplicate literals, false literals and tautologies
+        literals = []
+        for lit in clause:
+            self.grow(abs(lit))
+            value = self.value(lit)
+            if value is True or -lit in literals:
+                return True
+            if value is None and lit not in literals:
+                literals.append(lit)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.enqueue(literals[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(literals)
+        return self.ok
+
+    def attach(self, clause):
+        """Stores `clause`, watching its first two literals."""
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def enqueue(self, lit, reason):
+        """Assigns `lit` true at the current decision level."""
+        var = abs(lit)
+        self.values[var] = lit > 0
+        self.levels[var] = self.level()
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """Performs unit propagation; returns a conflicting clause or None."""
+        while self.head < len(self.trail):
+            false_lit = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches[false_lit]
+            kept = []
+            i = 0
+            while i < len(watchers):
+                index = watchers[i]
+                i += 1
+                clause = self.clauses[index]
+
+                # Make sure the false literal is clause[1]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+
+                    # Clause is unit or conflicting
+                    if self.value(clause[0]) is False:
+                        kept.extend(watchers[i:])
+                        self.watches[false_lit] = kept
+                        return index
+                    self.enqueue(clause[0], index)
+            self.watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):
+        """Returns a learned clause and the level to backjump to."""
+        learned = [None]
+        seen = set()
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for q in clause:
+                var = abs(q)
+                if q == lit or var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.levels[var] == self.level():
+                    counter += 1
+                else:
+                    learned.append(q)
+
+            # Walk back to the next literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reasons[abs(lit)]]
+        learned[0] = -lit
+
+        # Watch the literal assigned last among the rest
+        level = 0
+        if len(learned) > 1:
+            best = max(range(1, len(learned)),
+                       key=lambda k: self.levels[abs(learned[k])])
+            learned[1], learned[best] = learned[best], learned[1]
+            level = self.levels[abs(learned[1])]
+        return learned, level
+
+    def bump(self, var):
+        """Increases the activity of a variable involved in a conflict."""
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+
+    def backtrack(self, level):
+        """Undoes all assignments above decision level `level`."""
+        if self.level() <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phase[var] = self.values[var]
+            self.values[var] = None
+            self.reasons[var] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with highest activity, or None."""
+        best, var = -1.0, None
+        for v in range(1, len(self.values)):
+            if self.values[v] is None and self.activity[v] > best:
+                best, var = self.activity[v], v
+        return var
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        `assumptions` true, False otherwise. Learned clauses are kept, so
+        the solver can be queried repeatedly with different assumptions.
+        """
+        if not self.ok:
+            return False
+        for lit in assumptions:
+            self.grow(abs(lit))
+        self.backtrack(0)
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+
+                # Conflict without any decisions: no model exists
+                if self.level() == 0:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    self.enqueue(learned[0], self.attach(learned))
+                self.increment *= 1.05
+                continue
+
+            # Assert assumptions first, one decision level each
+            if self.level() < len(assumptions):
+                lit = assumptions[self.level()]
+                value = self.value(lit)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.enqueue(lit, None)
+                continue
+
+            var = self.decide()
+            if var is None:
+                self.model = {v: self.values[v]
+                              for v in range(1, len(self.values))}
+                self.backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(var if self.phase[var] else -var, None)
+
+
+def dpll_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, like `model_check`, by showing
+    that knowledge and not query has no model with a CDCL solver.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    lit = cnf.literal(query)
+    return not Solver(cnf.clauses).solve([-lit])
+
+
+class KnowledgeBase():
+
+    def __init__(self, *sentences):
+        """
+        Initialize a knowledge base from `sentences`.
+        Sentences are encoded into one incremental solver, so queries do
+        not repeat work, and answers are cached until knowledge is added.
+        """
+        self.sentences = []
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.synced = 0
+        self.answers = dict()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds `sentence` to the knowledge base."""
+        self.cnf.add(sentence)
+        self.sentences.append(sentence)
+
+        # Entailment is monotonic: only negative answers can change
+        self.answers = {
+            query: answer for query, answer in self.answers.items() if answer
+        }
+
+    def sync(self):
+        """Passes clauses not yet seen by the solver on to it."""
+        for clause in self.cnf.clauses[self.synced:]:
+            self.solver.add_clause(clause)
+        self.synced = len(self.cnf.clauses)
+        self.solver.grow(self.cnf.num_vars)
+
+    def ask(self, query):
+        """Checks if the knowledge base entails `query`."""
+        if query not in self.answers:
+            lit = self.cnf.literal(query)
+            self.sync()
+            self.answers[query] = not self.solver.solve([-lit])
+        return self.answers[query]
+
+    def entailed(self, symbols=None):
+        """
+        Returns the symbols in `symbols`, by default every symbol in the
+        knowledge base, that the knowledge base entails.
+        """
+        if symbols is None:
+            symbols = [Symbol(name) for name in self.cnf.variables]
+        variables = {symbol: self.cnf.literal(symbol) for symbol in symbols}
+        self.sync()
+
+        # Only symbols true in some model can be entailed
+        if not self.solver.solve():
+            candidates = set(symbols)
+        else:
+            model = self.solver.model
+            candidates = {
+                symbol for symbol in symbols if model[variables[symbol]]
+            }
+
+        for symbol in symbols:
+            if symbol not in candidates:
+                self.answers[symbol] = False
+            elif symbol not in self.answers:
+
+                # A model where the symbol is false rules out every other
+                # candidate that is also false in it
+                if self.solver.solve([-variables[symbol]]):
+                    model = self.solver.model
+                    for other in list(candidates):
+                        if not model[variables[other]]:
+                            candidates.remove(other)
+                            self.answers[other] = False
+                else:
+                    self.answers[symbol] = True
+
+        return [symbol for symbol in symbols if self.answers[symbol]]
@@ -0,0 +1,79 @@
+"""
+Time parsing, solving and rendering mazes of several sizes with every
+search strategy, for both the `Maze` solver and the NumPy `Grid`.
+
+Usage: python benchmark.py [size ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from grid import Grid
+from maze import Maze, STRATEGIES, generate
+
+SIZES = [21, 51, 101, 201]
+
+# Images are drawn 50 pixels per cell, so only small mazes are rendered
+RENDER_LIMIT = 101
+
+# Each measurement is the best of this many runs
+REPEAT = 3
+
+
+def best(function):
+    """Returns the fewest milliseconds `function` took over `REPEAT` runs."""
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def measure(filename, size, directory):
+    """Returns a row of timings, in milliseconds, for one maze."""
+    row = {"size": size}
+    row["parse"] = best(lambda: Maze(filename))
+    row["parse grid"] = best(lambda: Grid.from_text(filename))
+
+    m = Maze(filename)
+    for strategy in STRATEGIES:
+        row[strategy] = best(lambda: m.solve(strategy))
+    grid = Grid.from_text(filename)
+    for strategy in ["bfs", "astar"]:
+        row[f"grid {strategy}"] = best(lambda: grid.solve(strategy))
+
+    if size <= RENDER_LIMIT:
+        image = os.path.join(directory, "maze.png")
+        row["render"] = best(
+            lambda: m.output_image(image, show_explored=True)
+        )
+    else:
+        row["render"] = None
+    return row
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filename = os.path.join(directory, f"maze{size}.txt")
+            generate(filename, size, size, seed=size)
+            rows.append(measure(filename, size, directory))
+
+    columns = [column for column in rows[0] if column != "size"]
+    print()
+    print("Milliseconds, best of", REPEAT)
+    print(f"{'size':>6}" + "".join(f"{column:>12}" for column in columns))
+    for row in rows:
+        print(f"{row['size']:>6}" + "".join(
+            f"{'-':>12}" if row[column] is None else f"{row[column]:>12.2f}"
+            for column in columns
+        ))
+
+
+if __name__ == "__main__":
+    main()
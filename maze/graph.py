@@ -0,0 +1,368 @@
+"""
+Reduced search graphs for repeated maze queries.
+
+`CorridorGraph` compresses a `Grid` into junctions and dead ends joined by
+weighted corridors, so a search only expands the cells where a choice is
+made. `jump_point_search` skips along straight lines of open grids.
+"""
+import heapq
+import random
+import sys
+import time
+
+import numpy as np
+
+from grid import Grid
+
+
+class CorridorGraph():
+
+    def __init__(self, grid):
+        """
+        Initialize the graph of `grid`. Every open cell that does not have
+        exactly two open neighbors is a node, and each run of two-neighbor
+        cells between nodes is one corridor edge. A corridor's cells are
+        numbered 0 to length - 1 from its first node `u` to its second
+        node `v`; `u` is position -1 and `v` is position length.
+        """
+        self.grid = grid
+        offsets = [int(offset) for offset in grid.offsets]
+        cells = grid.open
+
+        # Count open neighbors of every cell at once
+        degree = np.zeros(cells.size, dtype=np.uint8)
+        inner = np.arange(grid.stride, cells.size - grid.stride)
+        for offset in offsets:
+            degree[inner] += cells[inner + offset]
+        self.is_node = cells & (degree != 2)
+
+        # Corridor of each cell and the cell's position in it, or -1
+        self.corridor = np.full(cells.size, -1, dtype=np.int64)
+        self.position = np.full(cells.size, -1, dtype=np.int64)
+
+        # Per edge: end nodes, first cell in `cells`, length, weights
+        self.u, self.v, self.first, self.length = [], [], [], []
+        self.cells = []
+        self.adjacent = dict()
+
+        for node in np.flatnonzero(self.is_node).tolist():
+            self.trace(node, offsets)
+
+        # Loops with no junction at all get one of their cells as a node
+        while True:
+            remaining = np.flatnonzero(cells & ~self.is_node
+                                       & (self.corridor < 0))
+            if remaining.size == 0:
+                break
+            node = int(remaining[0])
+            self.is_node[node] = True
+            self.trace(node, offsets)
+
+        self.cells = np.array(self.cells, dtype=np.int64)
+        self.forward = []
+        self.backward = []
+        for e in range(len(self.u)):
+            interior = int(grid.costs[self.segment(e)].sum(dtype=np.int64))
+            self.forward.append(interior + int(grid.costs[self.v[e]]))
+            self.backward.append(interior + int(grid.costs[self.u[e]]))
+
+    def trace(self, node, offsets):
+        """Adds every corridor leaving `node` that is not yet in the graph."""
+        grid = self.grid
+        for offset in offsets:
+            current = node + offset
+            if not grid.open[current]:
+                continue
+            if self.is_node[current]:
+                if node < current:
+                    self.add_edge(node, current, [])
+                continue
+            if self.corridor[current] >= 0:
+                continue
+
+            # Walk along the corridor until reaching a node
+            previous, run = node, []
+            while not self.is_node[current]:
+                run.append(current)
+                for step in offsets:
+                    following = current + step
+                    if following != previous and grid.open[following]:
+                        break
+                previous, current = current, following
+            self.add_edge(node, current, run)
+
+    def add_edge(self, u, v, run):
+        """Adds a corridor from node `u` to node `v` through cells `run`."""
+        e = len(self.u)
+        self.u.append(u)
+        self.v.append(v)
+        self.first.append(len(self.cells))
+        self.length.append(len(run))
+        for position, cell in enumerate(run):
+            self.corridor[cell] = e
+            self.position[cell] = position
+        self.cells.extend(run)
+        if u != v:
+            self.adjacent.setdefault(u, []).append((v, e, -1, len(run)))
+            self.adjacent.setdefault(v, []).append((u, e, len(run), -1))
+
+    def segment(self, e):
+        """Returns the flat indices of the cells of corridor `e`."""
+        return self.cells[self.first[e]:self.first[e] + self.length[e]]
+
+    def at(self, e, position):
+        """Returns the cell at `position` of corridor `e`."""
+        if position < 0:
+            return self.u[e]
+        elif position >= self.length[e]:
+            return self.v[e]
+        return int(self.cells[self.first[e] + position])
+
+    def steps(self, e, a, b):
+        """Returns the cells passed going from position `a` to `b`."""
+        direction = 1 if b > a else -1
+        return [self.at(e, p) for p in range(a + direction, b + direction,
+                                              direction)]
+
+    def weight(self, e, a, b):
+        """Returns the cost of going from position `a` to `b` of `e`."""
+        if a == -1 and b == self.length[e]:
+            return self.forward[e]
+        if b == -1 and a == self.length[e]:
+            return self.backward[e]
+        return int(self.grid.costs[self.steps(e, a, b)].sum(dtype=np.int64))
+
+    def attach(self, cell):
+        """
+        Returns the hops `(node, e, a, b)` linking `cell` to the graph, or
+        None if `cell` is itself a node.
+        """
+        if self.is_node[cell]:
+            return None
+        e = int(self.corridor[cell])
+        p = int(self.position[cell])
+        return [(self.u[e], e, p, -1), (self.v[e], e, p, self.length[e])]
+
+    def solve(self, start, goal):
+        """
+        Finds the cheapest path between cells `start` and `goal`, given as
+        (i, j), with A* on the graph. Returns `(actions, cells)` like
+        `Maze.solve` and sets `num_explored` to the graph nodes expanded.
+        """
+        grid = self.grid
+        start, goal = grid.index(start), grid.index(goal)
+        if not grid.open[start] or not grid.open[goal]:
+            raise Exception("start and goal must be open cells")
+
+        # Query cells inside corridors get temporary edges to its ends
+        extra = dict()
+        for cell, links in [(start, self.attach(start)),
+                            (goal, self.attach(goal))]:
+            for node, e, a, b in links or []:
+                if cell == start:
+                    extra.setdefault(start, []).append((node, e, a, b))
+                else:
+                    extra.setdefault(node, []).append((goal, e, b, a))
+        if (not self.is_node[start] and not self.is_node[goal]
+                and self.corridor[start] == self.corridor[goal]):
+            e = int(self.corridor[start])
+            extra.setdefault(start, []).append(
+                (goal, e, int(self.position[start]), int(self.position[goal]))
+            )
+
+        costs = {start: 0}
+        parents = {start: None}
+        explored = set()
+        frontier = [(grid.heuristic(start, goal), 0, start)]
+        self.num_explored = 0
+        while frontier:
+            _, cost, node = heapq.heappop(frontier)
+            if node in explored:
+                continue
+            explored.add(node)
+            self.num_explored += 1
+            if node == goal:
+                break
+            for neighbor, e, a, b in (self.adjacent.get(node, [])
+                                      + extra.get(node, [])):
+                new_cost = cost + self.weight(e, a, b)
+                if neighbor not in costs or new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = (node, e, a, b)
+                    heapq.heappush(frontier, (
+                        new_cost + grid.heuristic(neighbor, goal), new_cost,
+                        neighbor
+                    ))
+        if goal not in explored:
+            raise Exception("no solution")
+        self.solution_cost = costs[goal]
+        return self.expand(parents, start, goal)
+
+    def expand(self, parents, start, goal):
+        """Turns graph hops back into the actions and cells of a path."""
+        hops = []
+        node = goal
+        while node != start:
+            hops.append(parents[node])
+            node = parents[node][0]
+        indices = []
+        for _, e, a, b in reversed(hops):
+            indices.extend(self.steps(e, a, b))
+        return path(self.grid, start, indices)
+
+
+def path(grid, start, indices):
+    """Returns `(actions, cells)` for walking from `start` via `indices`."""
+    moves = dict(zip(grid.offsets.tolist(), grid.actions))
+    previous = [start] + indices[:-1]
+    actions = [moves[index - parent]
+               for index, parent in zip(indices, previous)]
+    return actions, [grid.cell(index) for index in indices]
+
+
+def jump_point_search(grid, start, goal):
+    """
+    Finds a shortest path between cells `start` and `goal` of a grid in
+    which every open cell costs 1, expanding only jump points: moving
+    vertically, a cell is a jump point if a horizontal scan from it finds
+    one; moving horizontally, a cell is a jump point if an opening above
+    or below it was walled off in the previous cell. Returns
+    `(actions, cells)` and the number of jump points expanded.
+    """
+    if np.any(grid.costs[grid.open] > 1):
+        raise Exception("jump point search needs a maze without costs")
+    start, goal = grid.index(start), grid.index(goal)
+    cells = grid.open
+    up, down, left, right = (int(offset) for offset in grid.offsets)
+
+    def forced(cell, dx):
+        return ((cells[cell + up] and not cells[cell - dx + up])
+                or (cells[cell + down] and not cells[cell - dx + down]))
+
+    def jump_horizontal(cell, dx):
+        while True:
+            cell += dx
+            if not cells[cell]:
+                return None
+            if cell == goal or forced(cell, dx):
+                return cell
+
+    def jump_vertical(cell, dy):
+        while True:
+            cell += dy
+            if not cells[cell]:
+                return None
+            if (cell == goal or jump_horizontal(cell, left) is not None
+                    or jump_horizontal(cell, right) is not None):
+                return cell
+
+    def directions(cell, parent):
+        if parent is None:
+            return [up, down, left, right]
+        step = cell - parent
+        if abs(step) >= grid.stride:
+            dy = up if step < 0 else down
+            return [dy, left, right]
+        dx = left if step < 0 else right
+        result = [dx]
+        for dy in [up, down]:
+            if cells[cell + dy] and not cells[cell - dx + dy]:
+                result.append(dy)
+        return result
+
+    costs = {start: 0}
+    parents = {start: None}
+    explored = set()
+    frontier = [(grid.heuristic(start, goal), 0, start)]
+    while frontier:
+        _, cost, cell = heapq.heappop(frontier)
+        if cell in explored:
+            continue
+        explored.add(cell)
+        if cell == goal:
+            break
+        for direction in directions(cell, parents[cell]):
+            if direction in (left, right):
+                point = jump_horizontal(cell, direction)
+            else:
+                point = jump_vertical(cell, direction)
+            if point is None:
+                continue
+            new_cost = cost + abs(point - cell) // abs(direction)
+            if point not in costs or new_cost < costs[point]:
+                costs[point] = new_cost
+                parents[point] = cell
+                heapq.heappush(frontier, (
+                    new_cost + grid.heuristic(point, goal), new_cost, point
+                ))
+    if goal not in explored:
+        raise Exception("no solution")
+
+    # Fill in the straight lines between jump points
+    points = []
+    cell = goal
+    while cell != start:
+        points.append(cell)
+        cell = parents[cell]
+    indices = []
+    previous = start
+    for point in reversed(points):
+        step = grid.stride if abs(point - previous) >= grid.stride else 1
+        step = step if point > previous else -step
+        indices.extend(range(previous + step, point + step, step))
+        previous = point
+    return path(grid, start, indices), len(explored)
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python graph.py maze.txt [queries]")
+    grid = Grid.from_text(sys.argv[1])
+    queries = int(sys.argv[2]) if len(sys.argv) == 3 else 100
+
+    started = time.perf_counter()
+    graph = CorridorGraph(grid)
+    print(f"Open cells: {np.count_nonzero(grid.open)}")
+    print(f"Graph: {np.count_nonzero(graph.is_node)} nodes, "
+          f"{len(graph.u)} corridors, built in "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Random start and goal pairs among open cells
+    generator = random.Random(0)
+    open_cells = np.flatnonzero(grid.open)
+    pairs = [tuple(grid.cell(generator.choice(open_cells)) for _ in range(2))
+             for _ in range(queries)]
+
+    uniform = not np.any(grid.costs[grid.open] > 1)
+    grid_explored = graph_explored = jump_explored = 0
+    grid_time = graph_time = jump_time = 0
+    for start, goal in pairs:
+        grid.start, grid.goal = grid.index(start), grid.index(goal)
+        started = time.perf_counter()
+        grid.solve("astar")
+        grid_time += time.perf_counter() - started
+        grid_explored += grid.num_explored
+
+        started = time.perf_counter()
+        graph.solve(start, goal)
+        graph_time += time.perf_counter() - started
+        graph_explored += graph.num_explored
+        if graph.solution_cost != grid.solution_cost:
+            raise Exception(f"graph path from {start} to {goal} is not optimal")
+
+        if uniform:
+            started = time.perf_counter()
+            _, explored = jump_point_search(grid, start, goal)
+            jump_time += time.perf_counter() - started
+            jump_explored += explored
+
+    print(f"{queries} queries: grid A* expanded {grid_explored} cells in "
+          f"{grid_time * 1000:.1f} ms, corridor graph expanded "
+          f"{graph_explored} nodes in {graph_time * 1000:.1f} ms")
+    if uniform:
+        print(f"Jump point search expanded {jump_explored} jump points in "
+              f"{jump_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+NumPy grid backend for large mazes.
+
+The maze is held as one array of cell codes with a border of walls, so
+cells are flat integer indices and neighbors are found by adding fixed
+offsets, without bounds checks or per-cell Python objects.
+"""
+import heapq
+import sys
+import time
+
+import numpy as np
+
+# Cell codes: walls are 0, open cells hold the cost of entering them
+WALL = 0
+START = 10
+GOAL = 11
+
+# Byte values of the maze file characters for open cells
+OPEN_CHARACTERS = {ord(" "): 1, ord("A"): START, ord("B"): GOAL}
+OPEN_CHARACTERS.update({ord(str(cost)): cost for cost in range(1, 10)})
+
+
+class Grid():
+
+    def __init__(self, codes):
+        """
+        Initialize a maze from a 2D array of cell codes, as read by
+        `from_text` or `load`. `codes` must already have a border of walls.
+        """
+        if np.count_nonzero(codes == START) != 1:
+            raise Exception("maze must have exactly one start point")
+        if np.count_nonzero(codes == GOAL) != 1:
+            raise Exception("maze must have exactly one goal")
+
+        self.codes = codes
+        self.height = codes.shape[0] - 2
+        self.width = codes.shape[1] - 2
+        self.stride = codes.shape[1]
+        self.cells = codes.reshape(-1)
+        self.start = int(np.flatnonzero(self.cells == START)[0])
+        self.goal = int(np.flatnonzero(self.cells == GOAL)[0])
+
+        # Costs of entering each cell, with the start and goal costing 1
+        self.costs = np.where(self.cells > 9, 1, self.cells).astype(np.uint8)
+        self.open = self.cells != WALL
+
+        self.offsets = np.array([-self.stride, self.stride, -1, 1])
+        self.actions = ["up", "down", "left", "right"]
+        self.solution = None
+
+    @classmethod
+    def from_text(cls, filename):
+        """
+        Reads a maze file like `Maze` does, parsing it with NumPy instead
+        of one character at a time. Short lines are padded with open cells.
+        """
+        with open(filename, "rb") as f:
+            data = f.read()
+        characters = np.frombuffer(data, dtype=np.uint8)
+
+        # Map every byte value to a cell code at once
+        table = np.zeros(256, dtype=np.uint8)
+        for character, code in OPEN_CHARACTERS.items():
+            table[character] = code
+
+        lines = data.splitlines()
+        height = len(lines)
+        width = max(len(line) for line in lines)
+        codes = np.zeros((height + 2, width + 2), dtype=np.uint8)
+
+        # Equal-length lines can be reshaped without splitting
+        if (b"\r" not in data and len(data) == height * (width + 1)
+                and all(len(line) == width for line in lines)):
+            rows = characters.reshape(height, width + 1)[:, :width]
+            codes[1:-1, 1:-1] = table[rows]
+        else:
+            for i, line in enumerate(lines):
+                row = np.frombuffer(line.ljust(width), dtype=np.uint8)
+                codes[i + 1, 1:-1] = table[row]
+        return cls(codes)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Memory-maps a maze saved with `save`, so it is not read into
+        memory until cells are used.
+        """
+        return cls(np.load(filename, mmap_mode="r"))
+
+    def save(self, filename):
+        """Saves the cell codes in NumPy's binary `.npy` format."""
+        np.save(filename, self.codes)
+
+    def index(self, cell):
+        """Returns the flat index of cell (i, j)."""
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def cell(self, index):
+        """Returns the cell (i, j) of a flat index."""
+        i, j = divmod(int(index), self.stride)
+        return i - 1, j - 1
+
+    def heuristic(self, index, goal=None):
+        """Manhattan distance from a flat index to `goal` or the goal."""
+        i, j = divmod(index, self.stride)
+        goal_i, goal_j = divmod(self.goal if goal is None else goal,
+                                self.stride)
+        return abs(i - goal_i) + abs(j - goal_j)
+
+    def solve(self, strategy="bfs"):
+        """
+        Finds a solution to maze, if one exists, with "bfs" (expanding a
+        whole layer of cells per step with array operations) or "astar".
+        Sets `solution`, `num_explored`, `max_frontier` and `solve_time`
+        like `Maze.solve`.
+        """
+        started = time.perf_counter()
+        dtype = np.int32 if self.cells.size < 2 ** 31 else np.int64
+        self.parents = np.full(self.cells.size, -1, dtype=dtype)
+        if strategy == "bfs":
+            self.bfs()
+        elif strategy == "astar":
+            self.astar()
+        else:
+            raise Exception(f"unknown strategy {strategy}")
+        self.solve_time = time.perf_counter() - started
+
+        if self.parents[self.goal] < 0:
+            raise Exception("no solution")
+
+        # Follow parents back from the goal
+        moves = dict(zip(self.offsets.tolist(), self.actions))
+        indices = []
+        index = self.goal
+        while index != self.start:
+            indices.append(index)
+            index = int(self.parents[index])
+        indices.reverse()
+        previous = [self.start] + indices[:-1]
+        actions = [moves[index - parent]
+                   for index, parent in zip(indices, previous)]
+        cells = [self.cell(index) for index in indices]
+        self.solution = (actions, cells)
+        self.solution_cost = int(self.costs[indices].sum(dtype=np.int64))
+
+    def bfs(self):
+        """Breadth-first search, one layer of cells at a time."""
+        visited = np.zeros(self.cells.size, dtype=bool)
+        visited[self.start] = True
+        self.parents[self.start] = self.start
+        frontier = np.array([self.start])
+        self.num_explored = 0
+        self.max_frontier = 1
+
+        while frontier.size and not visited[self.goal]:
+            self.num_explored += frontier.size
+
+            # Every neighbor of every frontier cell, with where it came from
+            neighbors = (frontier[:, None] + self.offsets).reshape(-1)
+            sources = np.repeat(frontier, len(self.offsets))
+            new = self.open[neighbors] & ~visited[neighbors]
+            neighbors, sources = neighbors[new], sources[new]
+
+            # Keep one parent for cells reached from several sources
+            frontier, first = np.unique(neighbors, return_index=True)
+            self.parents[frontier] = sources[first]
+            visited[frontier] = True
+            self.max_frontier = max(self.max_frontier, frontier.size)
+        self.explored = visited
+
+    def astar(self):
+        """A* search over flat indices, counting cell costs."""
+        costs = np.full(self.cells.size, np.iinfo(np.int64).max, dtype=np.int64)
+        explored = np.zeros(self.cells.size, dtype=bool)
+        costs[self.start] = 0
+        self.parents[self.start] = self.start
+        frontier = [(self.heuristic(self.start), 0, self.start)]
+        offsets = [int(offset) for offset in self.offsets]
+        self.num_explored = 0
+        self.max_frontier = 1
+
+        while frontier:
+            _, cost, index = heapq.heappop(frontier)
+            if explored[index]:
+                continue
+            explored[index] = True
+            self.num_explored += 1
+            if index == self.goal:
+                break
+            for offset in offsets:
+                neighbor = index + offset
+                if not self.open[neighbor] or explored[neighbor]:
+                    continue
+                new_cost = cost + int(self.costs[neighbor])
+                if new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    self.parents[neighbor] = index
+                    heapq.heappush(frontier, (
+                        new_cost + self.heuristic(neighbor), new_cost, neighbor
+                    ))
+            self.max_frontier = max(self.max_frontier, len(frontier))
+        self.explored = explored
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python grid.py maze.txt|maze.npy [bfs|astar]")
+    filename = sys.argv[1]
+    started = time.perf_counter()
+    if filename.endswith(".npy"):
+        grid = Grid.load(filename)
+    else:
+        grid = Grid.from_text(filename)
+    parse_time = time.perf_counter() - started
+    grid.solve(sys.argv[2] if len(sys.argv) == 3 else "bfs")
+    print(f"Cells: {grid.height * grid.width}")
+    print(f"Parsed in {parse_time * 1000:.1f} ms")
+    print(f"Solved in {grid.solve_time * 1000:.1f} ms")
+    print("States Explored:", grid.num_explored)
+    print("Solution length:", len(grid.solution[1]))
@@ -1,45 +1,99 @@
+import collections
+import heapq
+import itertools
+import random
 import sys
+import time
 
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 
 class StackFrontier():
     def __init__(self):
         self.frontier = []
+        self.states = set()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states.add(node.state)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def __len__(self):
+        return len(self.frontier)
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.states.discard(node.state)
             return node
 
 
 # inherits from StackFrontier
 class QueueFrontier(StackFrontier):
+    def __init__(self):
+        self.frontier = collections.deque()
+        self.states = set()
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
             return node
 
+
+# removes the node with the lowest priority first
+class PriorityFrontier():
+    def __init__(self, priority):
+        self.priority = priority
+        self.heap = []
+        self.nodes = dict()
+        self.counter = itertools.count()
+
+    def add(self, node):
+        # replaces any node already in the frontier for the same state
+        self.nodes[node.state] = node
+        heapq.heappush(
+            self.heap, (self.priority(node), next(self.counter), node)
+        )
+
+    def contains_state(self, state):
+        return state in self.nodes
+
+    def get(self, state):
+        return self.nodes[state]
+
+    def empty(self):
+        return len(self.nodes) == 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def remove(self):
+        # skips heap entries for nodes that have since been replaced
+        while self.heap:
+            _, _, node = heapq.heappop(self.heap)
+            if self.nodes.get(node.state) is node:
+                del self.nodes[node.state]
+                return node
+        raise Exception("empty frontier")
+
+
+STRATEGIES = ["dfs", "bfs", "greedy", "astar", "dijkstra"]
+
 class Maze():
 
     def __init__(self, filename):
@@ -59,11 +113,15 @@ class Maze():
         self.height = len(contents)
         self.width = max(len(line) for line in contents)
 
-        # Keep track of walls
+        # Keep track of walls, and of the cost of entering each cell:
+        # digits 1-9 are open cells that cost that much to enter
         self.walls = []
+        self.costs = []
         for i in range(self.height):
             row = []
+            costs = []
             for j in range(self.width):
+                cost = 1
                 try:
                     if contents[i][j] == "A":
                         self.start = (i, j)
@@ -73,17 +131,22 @@ class Maze():
                         row.append(False)
                     elif contents[i][j] == " ":
                         row.append(False)
+                    elif contents[i][j] in "123456789":
+                        cost = int(contents[i][j])
+                        row.append(False)
                     else:
                         row.append(True)
                 except IndexError:
                     row.append(False)
+                costs.append(cost)
             self.walls.append(row)
+            self.costs.append(costs)
 
         self.solution = None
 
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         print()
         for i, row in enumerate(self.walls):
             for j, col in enumerate(row):
@@ -95,6 +158,8 @@ class Maze():
                     print("B", end="")
                 elif solution is not None and (i, j) in solution:
                     print("*", end="")
+                elif self.costs[i][j] > 1:
+                    print(self.costs[i][j], end="")
                 else:
                     print(" ", end="")
             print()
@@ -117,17 +182,45 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def heuristic(self, state):
+        """Manhattan distance from `state` to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def frontier(self, strategy):
+        """Returns an empty frontier for the search strategy."""
+        if strategy == "dfs":
+            return StackFrontier()
+        elif strategy == "bfs":
+            return QueueFrontier()
+        elif strategy == "greedy":
+            return PriorityFrontier(lambda node: self.heuristic(node.state))
+        elif strategy == "astar":
+            return PriorityFrontier(
+                lambda node: node.cost + self.heuristic(node.state)
+            )
+        elif strategy == "dijkstra":
+            return PriorityFrontier(lambda node: node.cost)
+        raise Exception(f"unknown strategy {strategy}")
+
+    def solve(self, strategy="dfs"):
+        """
+        Finds a solution to maze, if one exists, searching with one of
+        `STRATEGIES`. A* and Dijkstra find the cheapest path, counting
+        the cost of each cell entered.
+        """
+        started = time.perf_counter()
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        #frontier = QueueFrontier()
+        frontier = self.frontier(strategy)
         frontier.add(start)
+        self.max_frontier = 1
+
+        # Only cheapest-path searches may improve nodes in the frontier
+        improve = strategy in ["astar", "dijkstra"]
 
         # Initialize an empty explored set
         self.explored = set()
@@ -137,6 +230,7 @@ class Maze():
 
             # If nothing left in frontier, then no path
             if frontier.empty():
+                self.solve_time = time.perf_counter() - started
                 raise Exception("no solution")
 
             # Choose a node from the frontier
@@ -145,6 +239,7 @@ class Maze():
 
             # If node is the goal, then we have a solution
             if node.state == self.goal:
+                self.solution_cost = node.cost
                 actions = []
                 cells = []
                 while node.parent is not None:
@@ -154,6 +249,7 @@ class Maze():
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.solve_time = time.perf_counter() - started
                 return
 
             # Mark node as explored
@@ -161,12 +257,20 @@ class Maze():
 
             # Add neighbors to frontier
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
+                if state in self.explored:
+                    continue
+                cost = node.cost + self.costs[state[0]][state[1]]
+                if not frontier.contains_state(state) or (
+                    improve and cost < frontier.get(state).cost
+                ):
+                    child = Node(state=state, parent=node, action=action,
+                                 cost=cost)
                     frontier.add(child)
+            self.max_frontier = max(self.max_frontier, len(frontier))
 
 
     def output_image(self, filename, show_solution=True, show_explored=False):
+        # Pillow is only needed for images, so it is imported when drawing
         from PIL import Image, ImageDraw
         cell_size = 50
         cell_border = 2
@@ -179,7 +283,7 @@ class Maze():
         )
         draw = ImageDraw.Draw(img)
 
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         for i, row in enumerate(self.walls):
             for j, col in enumerate(row):
 
@@ -217,15 +321,83 @@ class Maze():
         img.save(filename)
 
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+def generate(filename, height, width, loops=0.1, seed=None):
+    """
+    Writes a random maze of `height` by `width` cells to `filename`,
+    carved by a randomized depth-first search from the top left. A
+    fraction `loops` of the remaining inner walls is then removed, so
+    there is more than one way through.
+    """
+    generator = random.Random(seed)
+    height -= (height + 1) % 2
+    width -= (width + 1) % 2
+    grid = [["#"] * width for _ in range(height)]
+
+    # Carve passages between cells at odd coordinates
+    grid[1][1] = " "
+    stack = [(1, 1)]
+    while stack:
+        i, j = stack[-1]
+        options = [(i + di, j + dj, i + di // 2, j + dj // 2)
+                   for di, dj in [(-2, 0), (2, 0), (0, -2), (0, 2)]
+                   if 0 < i + di < height - 1 and 0 < j + dj < width - 1
+                   and grid[i + di][j + dj] == "#"]
+        if not options:
+            stack.pop()
+            continue
+        r, c, wall_r, wall_c = generator.choice(options)
+        grid[wall_r][wall_c] = " "
+        grid[r][c] = " "
+        stack.append((r, c))
+
+    for i in range(1, height - 1):
+        for j in range(1, width - 1):
+            if grid[i][j] == "#" and (i + j) % 2 == 1 and generator.random() < loops:
+                grid[i][j] = " "
+
+    grid[1][1] = "A"
+    grid[height - 2][width - 2] = "B"
+    with open(filename, "w") as f:
+        f.write("\n".join("".join(row) for row in grid) + "\n")
+
+
+def compare(filename):
+    """Solves the maze with every strategy and prints their statistics."""
+    print(f"{filename}")
+    print(f"{'strategy':<10}{'explored':>10}{'frontier':>10}"
+          f"{'length':>8}{'cost':>8}{'ms':>10}")
+    for strategy in STRATEGIES:
+        m = Maze(filename)
+        m.solve(strategy)
+        print(f"{strategy:<10}{m.num_explored:>10}{m.max_frontier:>10}"
+              f"{len(m.solution[1]):>8}{m.solution_cost:>8}"
+              f"{m.solve_time * 1000:>10.1f}")
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--generate":
+        generate(sys.argv[4], int(sys.argv[2]), int(sys.argv[3]))
+        return
+
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python maze.py maze.txt [strategy|all]\n"
+                 "       python maze.py --generate height width maze.txt")
+
+    strategy = sys.argv[2] if len(sys.argv) == 3 else "dfs"
+    if strategy == "all":
+        compare(sys.argv[1])
+        return
+
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print(f"Solving with {strategy}...")
+    m.solve(strategy)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Answers many start/goal queries against one maze.
+
+The maze is loaded once. Endpoints that keep coming back get a shortest
+path tree that answers every later query from them by following parents,
+and the remaining queries run A* guided by distance tables to a few
+landmarks. Each answer is printed as one JSON line.
+"""
+import collections
+import heapq
+import json
+import sys
+import time
+
+import numpy as np
+
+from grid import Grid
+
+
+class MazeService():
+
+    def __init__(self, grid, landmarks=4, trees=4, threshold=2):
+        """
+        Initialize the service for `grid`, with distance tables to
+        `landmarks` cells, at most `trees` cached shortest path trees, and
+        building the tree of an endpoint the `threshold`-th time it is used.
+        """
+        self.grid = grid
+        self.uniform = not np.any(grid.costs[grid.open] > 1)
+        self.trees = collections.OrderedDict()
+        self.capacity = trees
+        self.threshold = threshold
+        self.uses = collections.Counter()
+
+        # Tables fit in 32 bits unless the maze is huge, as no path costs
+        # more than 9 per cell; unreachable cells get half the largest value
+        size = grid.cells.size
+        self.index_type = np.int32 if size < 2 ** 31 else np.int64
+        self.distance_type = np.int32 if 9 * size < 2 ** 30 else np.int64
+        self.unreachable = np.iinfo(self.distance_type).max // 2
+
+        started = time.perf_counter()
+        self.landmarks = []
+        self.distances = np.empty((0, size), dtype=self.distance_type)
+        if landmarks:
+            self.choose_landmarks(landmarks)
+        self.landmark_time = time.perf_counter() - started
+
+    @classmethod
+    def load(cls, filename, **options):
+        """Loads a maze from a text file or a saved `.npy` grid."""
+        if filename.endswith(".npy"):
+            return cls(Grid.load(filename), **options)
+        return cls(Grid.from_text(filename), **options)
+
+    def tree(self, source):
+        """
+        Returns arrays of distances from flat index `source` to every cell
+        and of each cell's parent on a cheapest path back to `source`.
+        """
+        if self.uniform:
+            return self.bfs_tree(source)
+        return self.dijkstra_tree(source)
+
+    def bfs_tree(self, source):
+        """Breadth-first shortest path tree, one layer at a time."""
+        grid = self.grid
+        distances = np.full(grid.cells.size, self.unreachable,
+                            dtype=self.distance_type)
+        parents = np.full(grid.cells.size, -1, dtype=self.index_type)
+        distances[source] = 0
+        parents[source] = source
+        frontier = np.array([source])
+        layer = 0
+        while frontier.size:
+            layer += 1
+            neighbors = (frontier[:, None] + grid.offsets).reshape(-1)
+            sources = np.repeat(frontier, len(grid.offsets))
+            new = grid.open[neighbors] & (parents[neighbors] < 0)
+            neighbors, sources = neighbors[new], sources[new]
+            frontier, first = np.unique(neighbors, return_index=True)
+            parents[frontier] = sources[first]
+            distances[frontier] = layer
+        return distances, parents
+
+    def dijkstra_tree(self, source):
+        """Cheapest path tree counting the cost of each cell entered."""
+        grid = self.grid
+        distances = np.full(grid.cells.size, self.unreachable,
+                            dtype=self.distance_type)
+        parents = np.full(grid.cells.size, -1, dtype=self.index_type)
+        distances[source] = 0
+        parents[source] = source
+        offsets = [int(offset) for offset in grid.offsets]
+        frontier = [(0, source)]
+        while frontier:
+            cost, index = heapq.heappop(frontier)
+            if cost > distances[index]:
+                continue
+            for offset in offsets:
+                neighbor = index + offset
+                if not grid.open[neighbor]:
+                    continue
+                new_cost = cost + int(grid.costs[neighbor])
+                if new_cost < distances[neighbor]:
+                    distances[neighbor] = new_cost
+                    parents[neighbor] = index
+                    heapq.heappush(frontier, (new_cost, neighbor))
+        return distances, parents
+
+    def choose_landmarks(self, k):
+        """
+        Picks `k` landmarks far apart: each new landmark is the reachable
+        cell farthest from all landmarks chosen so far.
+        """
+        grid = self.grid
+        distances, _ = self.tree(grid.start)
+        nearest = distances
+        tables = []
+        for _ in range(k):
+            reachable = np.where(nearest < self.unreachable, nearest, -1)
+            landmark = int(np.argmax(reachable))
+            if reachable[landmark] <= 0 and tables:
+                break
+            distances, _ = self.tree(landmark)
+            self.landmarks.append(landmark)
+            tables.append(distances)
+            nearest = np.minimum(nearest, distances)
+        self.distances = np.array(tables)
+
+    def cached_tree(self, index):
+        """Returns the cached tree rooted at `index`, or None."""
+        if index in self.trees:
+            self.trees.move_to_end(index)
+            return self.trees[index]
+        self.uses[index] += 1
+        if self.uses[index] < self.threshold:
+            return None
+
+        # Endpoint used often enough to be worth a whole tree
+        self.trees[index] = self.tree(index)
+        if len(self.trees) > self.capacity:
+            self.trees.popitem(last=False)
+        return self.trees[index]
+
+    def query(self, start, goal):
+        """
+        Returns a dict answering the query from cell `start` to cell
+        `goal`, given as (i, j), with the actions of a cheapest path, its
+        cost, how it was found and how long it took.
+        """
+        grid = self.grid
+        started = time.perf_counter()
+        answer = {"start": list(start), "goal": list(goal)}
+        try:
+            for i, j in [start, goal]:
+                if not (0 <= i < grid.height and 0 <= j < grid.width):
+                    raise Exception(f"cell {(i, j)} is outside the maze")
+            source, target = grid.index(start), grid.index(goal)
+            if not grid.open[source] or not grid.open[target]:
+                raise Exception("start and goal must be open cells")
+            indices, explored = self.search(source, target, answer)
+            answer["cost"] = int(grid.costs[indices].sum(dtype=np.int64))
+            answer["length"] = len(indices)
+            answer["explored"] = explored
+            answer["actions"] = self.actions(source, indices)
+        except Exception as error:
+            answer["error"] = str(error)
+        answer["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return answer
+
+    def search(self, source, target, answer):
+        """
+        Returns the flat indices of a cheapest path from `source` to
+        `target` and the number of cells expanded to find it.
+        """
+        if source == target:
+            return [], 0
+
+        # Trees answer queries from either end, since reversing a path
+        # only changes its cost by the cost of the two endpoints
+        for root, other, forward in [(source, target, True),
+                                     (target, source, False)]:
+            tree = self.cached_tree(root)
+            if tree is None:
+                continue
+            answer["method"] = "tree"
+            distances, parents = tree
+            if distances[other] >= self.unreachable:
+                raise Exception("no solution")
+            indices = []
+            index = other
+            while index != root:
+                indices.append(index)
+                index = int(parents[index])
+            if forward:
+                indices.reverse()
+            else:
+                indices = indices[1:] + [target]
+            return indices, 0
+        answer["method"] = "landmarks"
+        return self.astar(source, target)
+
+    def heuristic(self, index, target, goal_distances):
+        """
+        Lower bound on the cost from `index` to `target` by the triangle
+        inequality through every landmark, or Manhattan distance.
+        """
+        bound = self.grid.heuristic(index, target)
+        if self.landmarks:
+            distances = self.distances[:, index]
+            bound = max(
+                bound,
+                int((goal_distances - distances).max()),
+                int((distances - goal_distances).max())
+                - int(self.grid.costs[index]) + int(self.grid.costs[target])
+            )
+        return bound
+
+    def astar(self, source, target):
+        """A* search from `source` to `target` with landmark bounds."""
+        grid = self.grid
+        goal_distances = self.distances[:, target]
+        if np.any((goal_distances >= self.unreachable)
+                  != (self.distances[:, source] >= self.unreachable)):
+            raise Exception("no solution")
+
+        costs = {source: 0}
+        parents = {source: None}
+        explored = set()
+        offsets = [int(offset) for offset in grid.offsets]
+        frontier = [(self.heuristic(source, target, goal_distances), 0,
+                     source)]
+        while frontier:
+            _, cost, index = heapq.heappop(frontier)
+            if index in explored:
+                continue
+            explored.add(index)
+            if index == target:
+                break
+            for offset in offsets:
+                neighbor = index + offset
+                if not grid.open[neighbor] or neighbor in explored:
+                    continue
+                new_cost = cost + int(grid.costs[neighbor])
+                if neighbor not in costs or new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = index
+                    heapq.heappush(frontier, (
+                        new_cost
+                        + self.heuristic(neighbor, target, goal_distances),
+                        new_cost, neighbor
+                    ))
+        if target not in explored:
+            raise Exception("no solution")
+
+        indices = []
+        index = target
+        while index != source:
+            indices.append(index)
+            index = parents[index]
+        indices.reverse()
+        return indices, len(explored)
+
+    def actions(self, source, indices):
+        """Returns the actions that walk from `source` through `indices`."""
+        moves = dict(zip(self.grid.offsets.tolist(), self.grid.actions))
+        previous = [source] + indices[:-1]
+        return [moves[index - parent]
+                for index, parent in zip(indices, previous)]
+
+    def answer(self, lines):
+        """
+        Answers each query line `i1 j1 i2 j2` (commas allowed, blank lines
+        and lines starting with # skipped), yielding one dict per query.
+        """
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                i1, j1, i2, j2 = (int(value)
+                                  for value in line.replace(",", " ").split())
+            except ValueError:
+                yield {"query": line, "error": "expected i1 j1 i2 j2"}
+                continue
+            yield self.query((i1, j1), (i2, j2))
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python service.py maze.txt|maze.npy "
+                 "[queries.txt|-] [landmarks]")
+    started = time.perf_counter()
+    landmarks = int(sys.argv[3]) if len(sys.argv) == 4 else 4
+    service = MazeService.load(sys.argv[1], landmarks=landmarks)
+    print(f"Loaded in {(time.perf_counter() - started) * 1000:.1f} ms, "
+          f"{len(service.landmarks)} landmarks in "
+          f"{service.landmark_time * 1000:.1f} ms", file=sys.stderr)
+
+    # Queries come from a file, or standard input if none or "-" is given
+    if len(sys.argv) >= 3 and sys.argv[2] != "-":
+        lines = open(sys.argv[2])
+    else:
+        lines = sys.stdin
+
+    started = time.perf_counter()
+    count = 0
+    for answer in service.answer(lines):
+        print(json.dumps(answer), flush=True)
+        count += 1
+    elapsed = time.perf_counter() - started
+    print(f"Answered {count} queries in {elapsed * 1000:.1f} ms",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare learned Nim policies with the exact solver across pile sizes.
+
+Usage: python benchmark.py [games]
+"""
+import itertools
+import sys
+import time
+
+from nim import DenseNimAI, OptimalNimAI, optimal_action, train_batch
+
+CONFIGURATIONS = [
+    [1, 3, 5, 7],
+    [2, 4, 6],
+    [3, 4, 5, 6],
+    [1, 3, 5, 7, 9],
+    [4, 6, 8, 10]
+]
+
+
+def evaluate(ai, initial):
+    """
+    Return the fraction of winning positions reachable from `initial` in
+    which `ai` chooses a winning action, and the mean seconds per choice.
+    """
+    winning = correct = 0
+    elapsed = 0
+    for piles in itertools.product(*(range(pile + 1) for pile in initial)):
+        piles = list(piles)
+        if optimal_action(piles) is None:
+            continue
+        winning += 1
+
+        start = time.perf_counter()
+        i, j = ai.choose_action(piles, epsilon=False)
+        elapsed += time.perf_counter() - start
+
+        # A winning action leaves objects in a position lost for the opponent
+        piles[i] -= j
+        if any(piles) and optimal_action(piles) is None:
+            correct += 1
+    return correct / winning, elapsed / winning
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [games]")
+    games = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    solver = OptimalNimAI()
+    results = []
+    for initial in CONFIGURATIONS:
+        start = time.time()
+        ai = train_batch(games, DenseNimAI(initial), progress=None)
+        training = time.time() - start
+        learned_quality, learned_latency = evaluate(ai, initial)
+        solver_quality, solver_latency = evaluate(solver, initial)
+        results.append((initial, ai.q.shape[0], training,
+                        learned_quality, learned_latency,
+                        solver_quality, solver_latency))
+
+    print()
+    print(f"{'piles':<18}{'states':>8}{'train s':>9}"
+          f"{'learned':>9}{'us/move':>9}{'solver':>9}{'us/move':>9}")
+    for (initial, states, training, learned_quality, learned_latency,
+         solver_quality, solver_latency) in results:
+        print(f"{str(initial):<18}{states:>8}{training:>9.2f}"
+              f"{learned_quality:>9.1%}{learned_latency * 1e6:>9.1f}"
+              f"{solver_quality:>9.1%}{solver_latency * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
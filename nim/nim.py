@@ -1,7 +1,66 @@
+import concurrent.futures
 import math
+import os
 import random
 import time
 
+import numpy as np
+
+
+class ActionTable():
+
+    # Tables already built, by initial piles
+    tables = dict()
+
+    def __init__(self, initial):
+        """
+        Initialize a table of the actions available in each state
+        reachable from `initial` piles.
+        A state is numbered by reading its piles as digits, where pile
+        `i` has base `initial[i] + 1`, so removing `j` items from pile
+        `i` lowers the state number by `j * strides[i]`.
+        """
+        self.initial = list(initial)
+        self.strides = []
+        stride = 1
+        for pile in reversed(self.initial):
+            self.strides.insert(0, stride)
+            stride *= pile + 1
+        self.num_states = stride
+        self.actions = dict()
+
+    @classmethod
+    def for_piles(cls, initial):
+        """
+        Return the shared table for games starting from `initial` piles.
+        """
+        key = tuple(initial)
+        if key not in cls.tables:
+            cls.tables[key] = cls(initial)
+        return cls.tables[key]
+
+    def encode(self, piles):
+        """
+        Return the state number of `piles`.
+        """
+        return sum(pile * stride for pile, stride in zip(piles, self.strides))
+
+    def decode(self, state):
+        """
+        Return the piles of state number `state` as a tuple.
+        """
+        return tuple((state // stride) % (pile + 1)
+                     for pile, stride in zip(self.initial, self.strides))
+
+    def available_actions(self, state):
+        """
+        Return the set of actions available in state number `state`,
+        computing it only the first time the state is seen.
+        """
+        if state not in self.actions:
+            self.actions[state] = Nim.available_actions(self.decode(state))
+        return self.actions[state]
+
 
 class Nim():
 
@@ -10,10 +69,13 @@ class Nim():
         Initialize game board.
         Each game board has
             - `piles`: a list of how many elements remain in each pile
+            - `state`: the piles as a state number of `table`
             - `player`: 0 or 1 to indicate which player's turn
             - `winner`: None, 0, or 1 to indicate who the winner is
         """
         self.piles = initial.copy()
+        self.table = ActionTable.for_piles(initial)
+        self.state = self.table.encode(self.piles)
         self.player = 0
         self.winner = None
 
@@ -25,12 +87,13 @@ class Nim():
 
         Action `(i, j)` represents the action of removing `j` items
         from pile `i` (where piles are 0-indexed).
+
+        `ActionTable.available_actions` caches these sets by state number.
         """
-        actions = set()
-        for i, pile in enumerate(piles):
-            for j in range(1, pile + 1):
-                actions.add((i, j))
-        return actions
+        return frozenset(
+            (i, j) for i, pile in enumerate(piles)
+            for j in range(1, pile + 1)
+        )
 
     @classmethod
     def other_player(cls, player):
@@ -63,10 +126,11 @@ class Nim():
 
         # Update pile
         self.piles[pile] -= count
+        self.state -= count * self.table.strides[pile]
         self.switch_player()
 
         # Check for a winner
-        if all(pile == 0 for pile in self.piles):
+        if self.state == 0:
             self.winner = self.player
 
 
@@ -85,6 +149,21 @@ class NimAI():
         self.q = dict()
         self.alpha = alpha
         self.epsilon = epsilon
+        self.table = None
+
+    def available_actions(self, state):
+        """
+        Return the actions available in the piles `state`, cached by state
+        number in the action table of the game being played. A table for
+        `state` itself is used when `state` is not reachable from the
+        piles of the current table, as at the start of a new game.
+        """
+        table = self.table
+        if (table is None or len(state) != len(table.initial)
+                or any(pile > limit
+                       for pile, limit in zip(state, table.initial))):
+            table = self.table = ActionTable.for_piles(state)
+        return table.available_actions(table.encode(state))
 
     def update(self, old_state, action, new_state, reward):
         """
@@ -133,7 +212,7 @@ class NimAI():
         Q-value in `self.q`. If there are no available actions in
         `state`, return 0.
         """
-        pairs = Nim.available_actions(state)
+        pairs = self.available_actions(state)
         max_value = 0
         for pair in pairs:
             max_value = max(max_value, self.get_q_value(state, pair))
@@ -154,11 +233,11 @@ class NimAI():
         If multiple actions have the same Q-value, any of those
         options is an acceptable return value.
         """
-        pairs = Nim.available_actions(state)
+        pairs = self.available_actions(state)
 
         if epsilon:
             if random.random() <= self.epsilon:
-                return random.sample(pairs, 1)[0]
+                return random.choice(tuple(pairs))
 
         max_value = - math.inf
         for pair in pairs:
@@ -169,18 +248,255 @@ class NimAI():
         return max_pair
 
 
+class DenseNimAI(NimAI):
+
+    def __init__(self, initial=[1, 3, 5, 7], alpha=0.5, epsilon=0.1,
+                 q=None):
+        """
+        Initialize AI with a dense Q-table for games starting from
+        `initial` piles, an alpha (learning) rate, and an epsilon rate.
+
+        `self.q[s, a]` is the Q-value of state number `s` and action
+        number `a`. A state is numbered by reading its piles as digits,
+        where pile `i` has base `initial[i] + 1`, and actions `(i, j)`
+        are numbered pile by pile. Actions that are not available in a
+        state have Q-value -inf, so a plain max or argmax over a row
+        only considers available actions.
+
+        If `q` is given it is used as the Q-table as is, without building
+        a new one, and visits are only counted once it is updated.
+        """
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.initial = list(initial)
+        self.table = ActionTable.for_piles(initial)
+        self.strides = self.table.strides
+        num_states = self.table.num_states
+
+        self.actions = [(i, j) for i, pile in enumerate(self.initial)
+                        for j in range(1, pile + 1)]
+        self.action_numbers = {
+            action: a for a, action in enumerate(self.actions)
+        }
+        self.action_piles = np.array([i for i, j in self.actions], dtype=int)
+        self.action_counts = np.array([j for i, j in self.actions], dtype=int)
+
+        if q is None:
+            q = np.where(self.legal(np.arange(num_states)), 0.0, -np.inf)
+            visits = np.zeros(q.shape, dtype=np.int64)
+        elif q.shape != (num_states, len(self.actions)):
+            raise Exception(f"Q-table of shape {q.shape} is not for piles "
+                            f"{self.initial}")
+        else:
+            visits = None
+        self.q = q
+
+        # Number of times each Q-value has been updated
+        self.visits = visits
+
+    def legal(self, states):
+        """
+        Return, for each state number in `states`, which action numbers
+        are available in it.
+        """
+        piles = (states[:, None] // np.array(self.strides)
+                 % (np.array(self.initial) + 1))
+        return piles[:, self.action_piles] >= self.action_counts
+
+    def count_visits(self):
+        """
+        Return the visit counts, starting them at zero if the Q-table was
+        loaded rather than built.
+        """
+        if self.visits is None:
+            self.visits = np.zeros(self.q.shape, dtype=np.int64)
+        return self.visits
+
+    def save(self, filename):
+        """
+        Save the Q-table to `filename` in NumPy's binary `.npy` format.
+        The file is replaced in one step, so a reader never sees half of
+        a checkpoint.
+        """
+        temporary = f"{filename}.tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, self.q)
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename, initial=[1, 3, 5, 7], mmap_mode="r"):
+        """
+        Return an AI for `initial` piles using the Q-table saved in
+        `filename`. The table is memory-mapped rather than read, and no
+        other table is built, so loading is instant and processes share
+        one copy; it is read-only unless `mmap_mode` is "r+" or "c"
+        (copy-on-write).
+        """
+        return cls(initial, q=np.load(filename, mmap_mode=mmap_mode))
+
+    def encode(self, state):
+        """
+        Return the state number of the piles `state`.
+        """
+        return self.table.encode(state)
+
+    def get_q_value(self, state, action):
+        """
+        Return the Q-value for the state `state` and the action `action`.
+        """
+        return float(self.q[self.encode(state), self.action_numbers[action]])
+
+    def update_q_value(self, state, action, old_q, reward, future_rewards):
+        """
+        Update the Q-value for the state `state` and the action `action`,
+        using the same formula as `NimAI`.
+        """
+        s, a = self.encode(state), self.action_numbers[action]
+        self.q[s, a] = old_q + self.alpha * ((reward + future_rewards) - old_q)
+        self.count_visits()[s, a] += 1
+
+    def update_batch(self, states, actions, new_states, reward):
+        """
+        Apply `update` to arrays of state numbers, action numbers and new
+        state numbers at once, all with reward `reward`.
+
+        A pair that appears `k` times is updated `k` times in a row, as if
+        the updates were applied one after another, and its visits grow
+        by `k`. Future rewards are all read before any update is made.
+        """
+        keys = states * len(self.actions) + actions
+        _, first, counts = np.unique(keys, return_index=True,
+                                     return_counts=True)
+        states, actions = states[first], actions[first]
+
+        # The same pair always leads to the same new state, so k updates
+        # towards one target leave (1 - alpha) ** k of the old difference
+        old = self.q[states, actions]
+        target = reward + self.best_future_rewards(new_states[first])
+        self.q[states, actions] = (
+            target + (1 - self.alpha) ** counts * (old - target)
+        )
+        self.count_visits()[states, actions] += counts
+
+    def best_future_reward(self, state):
+        """
+        Given a state `state`, return the maximum Q-value over the actions
+        available in it, never less than 0 as in `NimAI`.
+        """
+        return max(0, float(self.q[self.encode(state)].max()))
+
+    def best_future_rewards(self, states):
+        """
+        Return `best_future_reward` for each state number in `states`.
+        """
+        return np.maximum(self.q[states].max(axis=1), 0)
+
+    def best_actions(self, states):
+        """
+        Return the number of the best available action for each state
+        number in `states`, which must not be terminal.
+        """
+        return self.q[states].argmax(axis=1)
+
+    def choose_action(self, state, epsilon=True):
+        """
+        Given a state `state`, return an action `(i, j)` to take, as
+        `NimAI.choose_action` does.
+        """
+        s = self.encode(state)
+
+        if epsilon:
+            if random.random() <= self.epsilon:
+                return self.actions[random.choice(
+                    np.flatnonzero(self.legal(np.array([s]))[0])
+                )]
+
+        return self.actions[int(self.q[s].argmax())]
+
 
-def train(n):
+class OptimalNimAI():
+
+    def choose_action(self, state, epsilon=True):
+        """
+        Given a state `state`, return a winning action `(i, j)` if there
+        is one, otherwise take one object from the largest pile.
+        `epsilon` is accepted for compatibility with `NimAI` and ignored.
+        """
+        action = optimal_action(state)
+        if action is None:
+            pile = max(range(len(state)), key=lambda i: state[i])
+            action = (pile, 1)
+        return action
+
+
+def optimal_action(piles):
     """
-    Train an AI by playing `n` games against itself.
+    Return a winning action `(i, j)` for the player to move in `piles`,
+    or None if every action loses against perfect play.
+
+    `Nim.move` makes the player who takes the last object lose (misère
+    play), which is won like ordinary Nim by moving to a nim-sum of 0,
+    except that once no pile would have more than one object left, the
+    winner leaves an odd number of piles with one object.
     """
+    large = [i for i, pile in enumerate(piles) if pile > 1]
+    ones = sum(1 for pile in piles if pile == 1)
+
+    # Only piles of one object: leave an odd number of them
+    if not large:
+        if ones % 2 == 0 and ones > 0:
+            return (piles.index(1), 1)
+        return None
+
+    # One large pile: reduce it to 0 or 1 to leave an odd number of ones
+    if len(large) == 1:
+        i = large[0]
+        keep = 1 if ones % 2 == 0 else 0
+        return (i, piles[i] - keep)
+
+    # Otherwise move to a nim-sum of 0
+    nim_sum = 0
+    for pile in piles:
+        nim_sum ^= pile
+    if nim_sum == 0:
+        return None
+    for i, pile in enumerate(piles):
+        if pile ^ nim_sum < pile:
+            return (i, pile - (pile ^ nim_sum))
+
+
+def train(n, player=None, progress=1000, initial=None, checkpoint=None):
+    """
+    Train an AI by playing `n` games against itself, starting from
+    `initial` piles: by default the piles `player` was built for, if
+    any, otherwise [1, 3, 5, 7].
+    `player` is the AI to train, by default a new `NimAI`.
+    Progress is printed every `progress` games, if not None, and if
+    `checkpoint` is a filename the AI, which must be a `DenseNimAI`, is
+    saved there at the same times and when training ends.
+    """
+
+    if player is None:
+        player = NimAI()
+    if checkpoint is not None and not isinstance(player, DenseNimAI):
+        raise Exception("only a DenseNimAI can be saved to a checkpoint")
 
-    player = NimAI()
+    # A DenseNimAI only has Q-values for states of its own piles
+    built_for = getattr(player, "initial", None)
+    if initial is None:
+        initial = built_for or [1, 3, 5, 7]
+    elif built_for is not None and list(initial) != built_for:
+        raise Exception(f"player was built for piles {built_for}, "
+                        f"not {list(initial)}")
+    start = time.time()
 
     # Play n games
     for i in range(n):
-        print(f"Playing training game {i + 1}")
-        game = Nim()
+        if progress and (i + 1) % progress == 0:
+            print(f"Playing training game {i + 1}")
+            if checkpoint is not None:
+                player.save(checkpoint)
+        game = Nim(initial)
 
         # Keep track of last move made by either player
         last = {
@@ -188,12 +504,15 @@ def train(n):
             1: {"state": None, "action": None}
         }
 
+        # States are immutable tuples, so each one is built only once
+        new_state = tuple(game.piles)
+
         # Game loop
         while True:
 
             # Keep track of current state and action
-            state = game.piles.copy()
-            action = player.choose_action(game.piles)
+            state = new_state
+            action = player.choose_action(state)
 
             # Keep track of last state and action
             last[game.player]["state"] = state
@@ -201,7 +520,7 @@ def train(n):
 
             # Make move
             game.move(action)
-            new_state = game.piles.copy()
+            new_state = tuple(game.piles)
 
             # When game is over, update Q values with rewards
             if game.winner is not None:
@@ -223,15 +542,150 @@ def train(n):
                     0
                 )
 
-    print("Done training")
+    if checkpoint is not None:
+        player.save(checkpoint)
+    report_throughput(n, start)
 
     # Return the trained AI
     return player
 
 
-def play(ai, human_player=None):
+def train_batch(n, player=None, batch=1024, progress=100000, rng=None,
+                checkpoint=None):
+    """
+    Train a `DenseNimAI` by playing `n` games against itself, with
+    `batch` games played side by side: each step makes one move in every
+    unfinished game at once and applies `train`'s updates for all of
+    them together with `update_batch`, so an update may read a Q-value
+    that a game earlier in the same step would already have changed.
+    Progress is printed every `progress` games, if not None, and if
+    `checkpoint` is a filename the AI is saved there at the same times
+    and when training ends.
+    """
+
+    if player is None:
+        player = DenseNimAI()
+    if rng is None:
+        rng = np.random.default_rng()
+    start = time.time()
+
+    # Playing action number `a` lowers the state number by `deltas[a]`
+    deltas = np.array([j * player.strides[i] for i, j in player.actions])
+    initial = player.encode(player.initial)
+
+    # State of each game, whose turn it is, and each player's last move
+    size = min(batch, n)
+    states = np.full(size, initial)
+    turns = np.zeros(size, dtype=int)
+    last_states = np.full((2, size), -1)
+    last_actions = np.full((2, size), -1)
+    active = np.ones(size, dtype=bool)
+    started, finished = size, 0
+    reported = 0
+
+    while active.any():
+        games = np.flatnonzero(active)
+        state = states[games]
+
+        # Choose the best action, or with probability epsilon a random one
+        action = player.best_actions(state)
+        explore = rng.random(len(games)) <= player.epsilon
+        if explore.any():
+            scores = rng.random((explore.sum(), len(player.actions)))
+            scores[~player.legal(state[explore])] = -1
+            action[explore] = scores.argmax(axis=1)
+
+        # Make moves, keeping track of last state and action
+        turn = turns[games]
+        new_state = state - deltas[action]
+        last_states[turn, games] = state
+        last_actions[turn, games] = action
+        states[games] = new_state
+        turns[games] = 1 - turn
+
+        # When a game is over, the mover loses and the other player wins;
+        # otherwise the other player's last move gets no reward yet
+        over = new_state == 0
+        previous_state = last_states[1 - turn, games]
+        previous_action = last_actions[1 - turn, games]
+        moved = previous_state >= 0
+        player.update_batch(state[over], action[over], new_state[over], -1)
+        player.update_batch(previous_state[over & moved],
+                            previous_action[over & moved],
+                            new_state[over & moved], 1)
+        player.update_batch(previous_state[~over & moved],
+                            previous_action[~over & moved],
+                            new_state[~over & moved], 0)
+
+        # Start new games in place of finished ones, while any remain
+        done = games[over]
+        finished += len(done)
+        restart = done[:max(0, n - started)]
+        started += len(restart)
+        states[restart] = initial
+        turns[restart] = 0
+        last_states[:, restart] = -1
+        last_actions[:, restart] = -1
+        active[done[len(restart):]] = False
+
+        if progress and finished // progress > reported:
+            reported = finished // progress
+            print(f"Played {finished} training games")
+            if checkpoint is not None:
+                player.save(checkpoint)
+
+    if checkpoint is not None:
+        player.save(checkpoint)
+    report_throughput(n, start)
+    return player
+
+
+def train_parallel(n, workers=None, batch=1024, initial=[1, 3, 5, 7]):
+    """
+    Train `workers` independent `DenseNimAI` learners on `n` games in
+    total, one process each, and return an AI whose Q-values are the
+    learners' Q-values averaged by how often each learner updated them.
+    """
+    start = time.time()
+    workers = workers or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        shares = [n // workers + (i < n % workers) for i in range(workers)]
+        learners = list(executor.map(
+            train_learner, shares, [batch] * workers,
+            [initial] * workers, range(workers)
+        ))
+
+    player = DenseNimAI(initial)
+    visits = sum(learner.count_visits() for learner in learners)
+    total = sum(np.where(learner.visits > 0, learner.q, 0) * learner.visits
+                for learner in learners)
+    player.visits = visits
+    player.q = np.where(
+        np.isfinite(player.q), total / np.maximum(visits, 1), -np.inf
+    )
+    report_throughput(n, start)
+    return player
+
+
+def train_learner(n, batch, initial, seed):
+    """
+    Train one learner for `train_parallel` in a worker process.
+    """
+    return train_batch(n, DenseNimAI(initial), batch, progress=None,
+                       rng=np.random.default_rng(seed))
+
+
+def report_throughput(n, start):
+    """
+    Print that training is done and how many games were played per second.
+    """
+    elapsed = max(time.time() - start, 1e-9)
+    print(f"Done training ({n / elapsed:.0f} games/sec)")
+
+
+def play(ai, human_player=None, initial=[1, 3, 5, 7]):
     """
-    Play human game against the AI.
+    Play human game against the AI, starting from `initial` piles.
     `human_player` can be set to 0 or 1 to specify whether
     human player moves first or second.
     """
@@ -241,7 +695,7 @@ def play(ai, human_player=None):
         human_player = random.randint(0, 1)
 
     # Create new game
-    game = Nim()
+    game = Nim(initial)
 
     # Game loop
     while True:
@@ -254,7 +708,7 @@ def play(ai, human_player=None):
         print()
 
         # Compute available actions
-        available_actions = Nim.available_actions(game.piles)
+        available_actions = game.table.available_actions(game.state)
         time.sleep(1)
 
         # Let human make a move
@@ -1,4 +1,27 @@
-from nim import train, play
+import os
+import sys
 
-ai = train(10000)
-play(ai)
+from nim import DenseNimAI, OptimalNimAI, train_batch, play
+
+# Largest number of states to learn a Q-table for; beyond this the AI
+# plays with the exact solver instead
+MAX_STATES = 10 ** 6
+
+initial = [int(pile) for pile in sys.argv[1:]] or [1, 3, 5, 7]
+states = 1
+for pile in initial:
+    states *= pile + 1
+
+# Q-table saved by a previous run, so play can start without training
+CHECKPOINT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "nim-" + "-".join(str(pile) for pile in initial) + ".npy"
+)
+
+if states > MAX_STATES:
+    ai = OptimalNimAI()
+elif os.path.exists(CHECKPOINT):
+    ai = DenseNimAI.load(CHECKPOINT, initial)
+else:
+    ai = train_batch(100000, DenseNimAI(initial), checkpoint=CHECKPOINT)
+play(ai, initial=initial)
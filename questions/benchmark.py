@@ -0,0 +1,113 @@
+"""
+Compare the list-based IDF computation questions.py used to have with the
+Counter-based `compute_idfs` and with sentence IDFs counted while
+indexing, over a corpus and a synthetic corpus many times its size.
+
+Usage: python benchmark.py corpus [scale]
+"""
+import math
+import random
+import sys
+import time
+
+from index import InvertedIndex
+from questions import compute_idfs
+
+# Each measurement is the best of this many runs
+REPEAT = 3
+
+# Fraction of synthetic words replaced by words not in the corpus
+NEW_WORDS = 0.1
+
+
+def list_idfs(documents):
+    """The original `compute_idfs`, checking a list for each word."""
+    word_count = dict()
+    for d in documents:
+        existing_words = []
+        for word in documents[d]:
+            if word not in existing_words:
+                existing_words.append(word)
+                if word in word_count:
+                    word_count[word] += 1
+                else:
+                    word_count[word] = 1
+    return {word: math.log(len(documents) / word_count[word])
+            for word in word_count}
+
+
+def best(function, repeat=REPEAT):
+    """Returns the fewest milliseconds `function` took over `repeat` runs."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def synthesize(index, scale, seed=0):
+    """
+    Returns an index `scale` times the size of `index`: each copy of a
+    file shuffles its sentences, and some words are replaced by new ones
+    so the vocabulary grows too.
+    """
+    generator = random.Random(seed)
+    synthetic = InvertedIndex()
+    for copy in range(scale):
+        for filename, document in index.documents.items():
+            sentences = []
+            for sentence, tokens in generator.sample(
+                document["sentences"], len(document["sentences"])
+            ):
+                tokens = [
+                    f"{word}{generator.randrange(scale)}"
+                    if generator.random() < NEW_WORDS else word
+                    for word in tokens
+                ]
+                sentences.append([f"{copy}-{filename}: {sentence}", tokens])
+            words = [word for _, tokens in sentences for word in tokens]
+            synthetic.add_tokens(f"{copy}-{filename}", words, sentences)
+    return synthetic
+
+
+def measure(name, index):
+    """Prints the milliseconds each IDF computation takes over `index`."""
+    filenames = list(index.documents)
+    files = {
+        filename: [word for _, tokens in document["sentences"]
+                   for word in tokens]
+        for filename, document in index.documents.items()
+    }
+    sentences = index.sentences(filenames)
+    if index.sentence_idfs(filenames) != compute_idfs(sentences):
+        raise Exception("sentence IDFs differ")
+
+    # The original is slow enough on large corpora to time only once
+    print(f"{name:<12}{len(files):>8}{len(sentences):>11}"
+          f"{best(lambda: list_idfs(files), repeat=1):>11.1f}"
+          f"{best(lambda: compute_idfs(files)):>11.1f}"
+          f"{best(lambda: list_idfs(sentences)):>11.1f}"
+          f"{best(lambda: compute_idfs(sentences)):>11.1f}"
+          f"{best(lambda: index.sentence_idfs(filenames)):>11.1f}")
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python benchmark.py corpus [scale]")
+    scale = int(sys.argv[2]) if len(sys.argv) == 3 else 100
+
+    index = InvertedIndex.update(sys.argv[1])
+    synthetic = synthesize(index, scale)
+
+    print()
+    print(f"Milliseconds, best of {REPEAT} (file list: one run)")
+    print(f"{'corpus':<12}{'files':>8}{'sentences':>11}"
+          f"{'file list':>11}{'file set':>11}"
+          f"{'sent list':>11}{'sent set':>11}{'indexed':>11}")
+    measure(sys.argv[1], index)
+    measure(f"{scale}x", synthetic)
+
+
+if __name__ == "__main__":
+    main()
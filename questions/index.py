@@ -0,0 +1,219 @@
+"""
+Inverted index over a corpus for questions.py.
+
+The index maps each term to postings (the files it appears in and how
+often), and keeps every file's sentences already tokenized. It is saved
+next to the corpus and only files that changed since are tokenized again,
+so repeat runs over the same corpus skip NLTK entirely.
+"""
+import collections
+import heapq
+import json
+import math
+import os
+
+from tokenizer import Tokenizer
+
+# Indexes saved in another format are rebuilt
+VERSION = 2
+
+
+class InvertedIndex():
+
+    def __init__(self):
+
+        # term -> {filename: number of times the term appears in it}
+        self.postings = dict()
+
+        # filename -> {"signature", "length", "sentences", "frequencies"},
+        # where sentences is a list of [sentence, tokens] pairs and
+        # frequencies maps words to the number of sentences they are in
+        self.documents = dict()
+        self.idfs = None
+
+    @classmethod
+    def build(cls, files, tokenizer=None):
+        """
+        Returns the index of `files`, a dictionary mapping filenames to
+        their contents as returned by `load_files`, tokenized by
+        `tokenizer` (by default a `Tokenizer` without a cache).
+        """
+        tokenizer = tokenizer or Tokenizer()
+        index = cls()
+        for filename, (words, sentences) in tokenizer.analyze_files(
+            files
+        ).items():
+            index.add_tokens(filename, words, sentences)
+        return index
+
+    def add_tokens(self, filename, words, sentences, signature=None):
+        """
+        Adds `filename` given its list of `words` and its `sentences` as
+        [sentence, tokens] pairs, counting the sentences each word is in.
+        """
+        if filename in self.documents:
+            self.remove(filename)
+        for word, count in collections.Counter(words).items():
+            self.postings.setdefault(word, dict())[filename] = count
+
+        # Repeated sentences count once, as keys of main's dictionary
+        unique = []
+        seen = set()
+        frequencies = collections.Counter()
+        for sentence, tokens in sentences:
+            if sentence not in seen:
+                seen.add(sentence)
+                unique.append([sentence, tokens])
+                frequencies.update(set(tokens))
+
+        self.documents[filename] = {
+            "signature": signature,
+            "length": len(words),
+            "sentences": unique,
+            "frequencies": frequencies
+        }
+        self.idfs = None
+
+    def remove(self, filename):
+        """Removes `filename` and its postings from the index."""
+        del self.documents[filename]
+        for word in list(self.postings):
+            self.postings[word].pop(filename, None)
+            if not self.postings[word]:
+                del self.postings[word]
+        self.idfs = None
+
+    def idf(self, word):
+        """Returns the IDF of `word` across files, or None if unseen."""
+        if self.idfs is None:
+            total = len(self.documents)
+            self.idfs = {
+                word: math.log(total / len(postings))
+                for word, postings in self.postings.items()
+            }
+        return self.idfs.get(word)
+
+    def top_files(self, query, n):
+        """
+        Returns the `n` files that best match `query` (a set of words) by
+        tf-idf, like `top_files` but only scoring files that contain at
+        least one of the query's words.
+        """
+        scores = dict()
+        for word in query:
+            idf = self.idf(word)
+            if idf is None:
+                continue
+            for filename, count in self.postings[word].items():
+                scores[filename] = scores.get(filename, 0) + idf * count
+
+        # Files without any query word follow with a score of zero
+        return heapq.nlargest(
+            n, self.documents, key=lambda filename: scores.get(filename, 0)
+        )
+
+    def sentences(self, filenames):
+        """
+        Returns a dictionary mapping each sentence of `filenames` to its
+        list of words, as main builds for `top_sentences`.
+        """
+        return {
+            sentence: tokens
+            for filename in filenames
+            for sentence, tokens in self.documents[filename]["sentences"]
+        }
+
+    def sentence_idfs(self, filenames):
+        """
+        Returns the IDF of every word across the sentences of `filenames`,
+        as `compute_idfs` would over the dictionary from `sentences`.
+        """
+        total = 0
+        frequencies = collections.Counter()
+        seen = set()
+        for filename in filenames:
+            document = self.documents[filename]
+            total += len(document["sentences"])
+            frequencies.update(document["frequencies"])
+
+            # A sentence repeated in another file is one dictionary key
+            if len(filenames) > 1:
+                for sentence, tokens in document["sentences"]:
+                    if sentence in seen:
+                        total -= 1
+                        frequencies.subtract(set(tokens))
+                    seen.add(sentence)
+        return {word: math.log(total / count)
+                for word, count in frequencies.items()}
+
+    def save(self, path):
+        """Writes the index to `path`, replacing any previous index."""
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf8") as f:
+            json.dump({
+                "version": VERSION,
+                "postings": self.postings,
+                "documents": self.documents
+            }, f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index saved with `save`."""
+        with open(path, encoding="utf8") as f:
+            data = json.load(f)
+        if data.get("version") != VERSION:
+            raise ValueError("index was saved in another format")
+        index = cls()
+        index.postings = data["postings"]
+        index.documents = data["documents"]
+        return index
+
+    @classmethod
+    def update(cls, directory, tokenizer=None, path=None):
+        """
+        Returns the index of the files in `directory`, loaded from `path`
+        (by default the directory's name followed by `.index`). Files that
+        were added, changed or removed since it was saved are tokenized by
+        `tokenizer` and the index saved again.
+        """
+        if path is None:
+            path = os.path.normpath(directory) + ".index"
+        try:
+            index = cls.load(path)
+        except (OSError, ValueError, KeyError):
+            index = cls()
+
+        filenames = os.listdir(directory)
+        removed = set(index.documents) - set(filenames)
+        for filename in removed:
+            index.remove(filename)
+
+        # Read the files whose size or modification time changed
+        changed = dict()
+        signatures = dict()
+        for filename in filenames:
+            file = os.path.join(directory, filename)
+            stat = os.stat(file)
+            signature = [stat.st_size, stat.st_mtime_ns]
+            document = index.documents.get(filename)
+            if document is not None and document["signature"] == signature:
+                continue
+            with open(file, encoding="utf8") as f:
+                changed[filename] = f.read()
+            signatures[filename] = signature
+
+        if changed:
+            tokenizer = tokenizer or Tokenizer()
+            for filename, (words, sentences) in tokenizer.analyze_files(
+                changed
+            ).items():
+                index.add_tokens(filename, words, sentences,
+                                 signatures[filename])
+
+            # Keep files in directory order, which breaks ties in rankings
+            index.documents = {filename: index.documents[filename]
+                               for filename in filenames}
+        if changed or removed:
+            index.save(path)
+        return index
@@ -1,10 +1,12 @@
+import collections
+import heapq
 import math
 import os
-import string
-
-import nltk
 import sys
 
+import tokenizer
+from index import InvertedIndex
+
 FILE_MATCHES = 1
 SENTENCE_MATCHES = 1
 
@@ -14,31 +16,21 @@ def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python questions.py corpus")
 
-    # Calculate IDF values across files
-    files = load_files(sys.argv[1])
-    file_words = {
-        filename: tokenize(files[filename])
-        for filename in files
-    }
-    file_idfs = compute_idfs(file_words)
+    # Index the files, reusing the saved index for unchanged files and
+    # cached tokens for files that changed on disk but not in content
+    cache = os.path.normpath(sys.argv[1]) + ".tokens"
+    index = InvertedIndex.update(sys.argv[1], tokenizer.Tokenizer(cache))
 
     # Prompt user for query
     query = set(tokenize(input("Query: ")))
 
     # Determine top file matches according to TF-IDF
-    filenames = top_files(query, file_words, file_idfs, n=FILE_MATCHES)
+    filenames = index.top_files(query, n=FILE_MATCHES)
 
-    # Extract sentences from top files
-    sentences = dict()
-    for filename in filenames:
-        for passage in files[filename].split("\n"):
-            for sentence in nltk.sent_tokenize(passage):
-                tokens = tokenize(sentence)
-                if tokens:
-                    sentences[sentence] = tokens
-
-    # Compute IDF values across sentences
-    idfs = compute_idfs(sentences)
+    # Extract sentences from top files, with IDF values counted while
+    # the files were indexed
+    sentences = index.sentences(filenames)
+    idfs = index.sentence_idfs(filenames)
 
     # Determine top sentence matches
     matches = top_sentences(query, sentences, idfs, n=SENTENCE_MATCHES)
@@ -74,14 +66,7 @@ def tokenize(document):
     Process document by coverting all words to lowercase, and removing any
     punctuation or English stopwords.
     """
-    # lower words
-    list = nltk.word_tokenize(document.lower())
-
-    # remove stop words and punctuation
-    list = [word for word in list if word not in nltk.corpus.stopwords.words("english")
-            and word not in string.punctuation]
-
-    return list
+    return tokenizer.tokenize(document)
 
 
 def compute_idfs(documents):
@@ -92,24 +77,14 @@ def compute_idfs(documents):
     Any word that appears in at least one of the documents should be in the
     resulting dictionary.
     """
-    word_count = dict()
-
-    # iterate over documents
-    for d in documents:
-
-        existing_words=[]
-
-        # iterate over words in each document
-        for word in documents[d]:
-            if word not in existing_words:
-                existing_words.append(word)
-                if word in word_count:
-                    word_count[word] += 1
-                else:
-                    word_count[word] = 1
+    # count each word once per document
+    word_count = collections.Counter()
+    for words in documents.values():
+        word_count.update(set(words))
 
     # calculate the IDF for each word
-    return {word: math.log(len(documents) / word_count[word]) for word in word_count}
+    total = len(documents)
+    return {word: math.log(total / count) for word, count in word_count.items()}
 
 
 def top_files(query, files, idfs, n):
@@ -130,7 +105,8 @@ def top_files(query, files, idfs, n):
 
         ranking[file] = sum
 
-    ranking = sorted(ranking.items(), key=lambda x: x[1], reverse=True)[:n]
+    # keep the n best in a heap rather than sorting every file
+    ranking = heapq.nlargest(n, ranking.items(), key=lambda x: x[1])
     return [r[0] for r in ranking]
 
 
@@ -156,7 +132,7 @@ def top_sentences(query, sentences, idfs, n):
         ranking.append(s)
 
     return [sentence for sentence, sum, freq in
-            sorted(ranking, key=lambda item: (item[1], item[2]), reverse=True)][:n]
+            heapq.nlargest(n, ranking, key=lambda item: (item[1], item[2]))]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+"""
+Vectorized ranking of files and sentences for questions.py.
+
+Files and sentences are rows of SciPy sparse matrices over the corpus
+vocabulary, so a query, or a whole batch of queries, is scored with one
+sparse matrix product, and the best `n` are picked with `argpartition`
+instead of sorting every candidate.
+
+Usage: python ranking.py corpus [queries.txt]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import scipy.sparse
+
+from index import InvertedIndex
+from questions import FILE_MATCHES, SENTENCE_MATCHES
+from tokenizer import Tokenizer, tokenize
+
+
+def top(scores, n, densities=None):
+    """
+    Returns the indices of the `n` highest `scores`, best first. Ties go
+    to the higher of `densities`, if given, and then to the lower index,
+    as a stable sort would order them.
+    """
+    n = min(n, len(scores))
+    if n == 0:
+        return np.array([], dtype=np.int64)
+
+    # Everything tied with the n-th best score is a candidate
+    threshold = scores[np.argpartition(scores, len(scores) - n)[-n]]
+    candidates = np.flatnonzero(scores >= threshold)
+    keys = [-candidates]
+    if densities is not None:
+        keys.append(densities[candidates])
+    keys.append(scores[candidates])
+    order = np.lexsort(keys)[::-1][:n]
+    return candidates[order]
+
+
+class RankingEngine():
+
+    def __init__(self, index):
+        """
+        Initialize the engine for `index`, with a matrix of term counts
+        per file and matrices of which words each sentence contains and
+        the share of its words each one makes up.
+        """
+        self.index = index
+        self.filenames = list(index.documents)
+
+        # Every word of every file and sentence gets a column
+        self.vocabulary = {word: i for i, word in enumerate(index.postings)}
+        for document in index.documents.values():
+            for _, tokens in document["sentences"]:
+                for word in tokens:
+                    self.vocabulary.setdefault(word, len(self.vocabulary))
+        size = len(self.vocabulary)
+
+        rows, columns, counts = [], [], []
+        numbers = {filename: i for i, filename in enumerate(self.filenames)}
+        for word, postings in index.postings.items():
+            for filename, count in postings.items():
+                rows.append(numbers[filename])
+                columns.append(self.vocabulary[word])
+                counts.append(count)
+        self.files = scipy.sparse.csr_matrix(
+            (counts, (rows, columns)), shape=(len(self.filenames), size)
+        )
+        frequencies = np.diff(self.files.tocsc().indptr)
+        self.file_idfs = np.zeros(size)
+        self.file_idfs[frequencies > 0] = np.log(
+            len(self.filenames) / frequencies[frequencies > 0]
+        )
+        self.tfidfs = self.files @ scipy.sparse.diags(self.file_idfs)
+
+        # One row per sentence, files one after another
+        self.sentences = []
+        self.bounds = {}
+        identifiers = {}
+        self.identifiers = []
+        rows, columns, present, densities = [], [], [], []
+        for filename, document in index.documents.items():
+            start = len(self.sentences)
+            for sentence, tokens in document["sentences"]:
+                row = len(self.sentences)
+                self.sentences.append(sentence)
+                self.identifiers.append(
+                    identifiers.setdefault(sentence, len(identifiers))
+                )
+                for word in set(tokens):
+                    rows.append(row)
+                    columns.append(self.vocabulary[word])
+                    present.append(1.0)
+                    densities.append(tokens.count(word) / len(tokens))
+            self.bounds[filename] = (start, len(self.sentences))
+        shape = (len(self.sentences), size)
+        self.present = scipy.sparse.csr_matrix(
+            (present, (rows, columns)), shape=shape
+        )
+        self.densities = scipy.sparse.csr_matrix(
+            (densities, (rows, columns)), shape=shape
+        )
+        self.identifiers = np.array(self.identifiers, dtype=np.int64)
+        self.selections = dict()
+
+    def queries(self, queries):
+        """
+        Returns a matrix with a column for each query (a set of words),
+        marking the words of the vocabulary it contains.
+        """
+        rows, columns = [], []
+        for column, query in enumerate(queries):
+            for word in query:
+                if word in self.vocabulary:
+                    rows.append(self.vocabulary[word])
+                    columns.append(column)
+        return scipy.sparse.csc_matrix(
+            (np.ones(len(rows)), (rows, columns)),
+            shape=(len(self.vocabulary), len(queries))
+        )
+
+    def top_files(self, queries, n):
+        """
+        Returns, for each query in `queries`, the `n` files that best
+        match it by tf-idf, as `top_files` would.
+        """
+        scores = (self.tfidfs @ self.queries(queries)).toarray()
+        return [[self.filenames[i] for i in top(scores[:, column], n)]
+                for column in range(len(queries))]
+
+    def selection(self, filenames):
+        """
+        Returns the sentence rows of `filenames`, without later copies of
+        a repeated sentence, with their matrices of IDFs (the sentence IDFs
+        across those rows) and of densities.
+        """
+        key = tuple(filenames)
+        if key not in self.selections:
+            rows = np.concatenate([
+                np.arange(*self.bounds[filename]) for filename in filenames
+            ]) if filenames else np.array([], dtype=np.int64)
+            _, first = np.unique(self.identifiers[rows], return_index=True)
+            rows = rows[np.sort(first)]
+
+            frequencies = np.asarray(self.present[rows].sum(axis=0)).ravel()
+            idfs = np.zeros(len(self.vocabulary))
+            idfs[frequencies > 0] = np.log(
+                len(rows) / frequencies[frequencies > 0]
+            )
+            self.selections[key] = (
+                rows,
+                self.present[rows] @ scipy.sparse.diags(idfs),
+                self.densities[rows]
+            )
+        return self.selections[key]
+
+    def top_sentences(self, queries, filenames, n):
+        """
+        Returns, for each query in `queries`, the `n` sentences of its
+        `filenames` (one list per query) that best match it, ranked like
+        `top_sentences`. Queries with the same files are scored together.
+        """
+        groups = dict()
+        for i, files in enumerate(filenames):
+            groups.setdefault(tuple(files), []).append(i)
+
+        results = [None] * len(queries)
+        for files, members in groups.items():
+            rows, idfs, densities = self.selection(files)
+            matrix = self.queries([queries[i] for i in members])
+            scores = (idfs @ matrix).toarray()
+            densities = (densities @ matrix).toarray()
+            for column, i in enumerate(members):
+                best = top(scores[:, column], n, densities[:, column])
+                results[i] = [self.sentences[row] for row in rows[best]]
+        return results
+
+    def answer(self, questions):
+        """Returns the best sentences for each question in `questions`."""
+        queries = [set(tokenize(question)) for question in questions]
+        filenames = self.top_files(queries, FILE_MATCHES)
+        return self.top_sentences(queries, filenames, SENTENCE_MATCHES)
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python ranking.py corpus [queries.txt]")
+
+    start = time.perf_counter()
+    cache = os.path.normpath(sys.argv[1]) + ".tokens"
+    engine = RankingEngine(
+        InvertedIndex.update(sys.argv[1], Tokenizer(cache))
+    )
+    print(f"Built {engine.files.shape[0]}x{engine.files.shape[1]} file and "
+          f"{engine.present.shape[0]}x{engine.present.shape[1]} sentence "
+          f"matrices in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Questions come from a file, or standard input
+    f = open(sys.argv[2], encoding="utf8") if len(sys.argv) == 3 else sys.stdin
+    questions = [line.strip() for line in f if line.strip()]
+
+    start = time.perf_counter()
+    answers = engine.answer(questions)
+    elapsed = time.perf_counter() - start
+    for question, sentences in zip(questions, answers):
+        print(f"Query: {question}")
+        for sentence in sentences:
+            print(sentence)
+    if questions:
+        print(f"{len(questions)} queries in {elapsed * 1000:.1f} ms, "
+              f"{elapsed / len(questions) * 1000:.3f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Answer a stream of questions about a corpus.
+
+Every file is indexed and split into sentence records once at startup;
+each query then only scores the files and sentences that contain one of
+its words, keeping the best in a heap. Queries are read interactively,
+or one per line from a file, and each answer is printed with how long it
+took.
+
+Usage: python session.py corpus [queries.txt]
+"""
+import heapq
+import os
+import sys
+import time
+
+from index import InvertedIndex
+from questions import FILE_MATCHES, SENTENCE_MATCHES
+from tokenizer import Tokenizer, tokenize
+
+# Sentence IDFs kept for this many different sets of top files
+IDF_CACHE = 64
+
+
+class Session():
+
+    def __init__(self, index):
+        """
+        Initialize a session over `index`, turning the sentences of every
+        file into records: for each word, the sentences of the file that
+        contain it and the share of each sentence's words it makes up.
+        """
+        self.index = index
+        self.records = dict()
+        for filename, document in index.documents.items():
+            postings = dict()
+            for number, (_, tokens) in enumerate(document["sentences"]):
+                for word in set(tokens):
+                    postings.setdefault(word, []).append(
+                        (number, tokens.count(word) / len(tokens))
+                    )
+            self.records[filename] = postings
+        self.idfs = dict()
+
+    def sentence_idfs(self, filenames):
+        """Returns the sentence IDFs of `filenames`, computed once per set."""
+        key = tuple(filenames)
+        if key not in self.idfs:
+            if len(self.idfs) >= IDF_CACHE:
+                del self.idfs[next(iter(self.idfs))]
+            self.idfs[key] = self.index.sentence_idfs(filenames)
+        return self.idfs[key]
+
+    def top_sentences(self, query, filenames, n):
+        """
+        Returns the `n` sentences of `filenames` that best match `query`
+        by matching word measure, then query term density, like
+        `top_sentences` over the sentences of those files.
+        """
+        idfs = self.sentence_idfs(filenames)
+        scores = dict()
+        for filename in filenames:
+            postings = self.records[filename]
+            for word in query:
+                for number, density in postings.get(word, []):
+                    idf, total = scores.get((filename, number), (0, 0))
+                    scores[(filename, number)] = (idf + idfs[word],
+                                                  total + density)
+
+        # Ties go to the sentence that comes first, and a sentence found
+        # in several files counts once, as in main's dictionary
+        ranked = dict()
+        offset = 0
+        offsets = dict()
+        for filename in filenames:
+            offsets[filename] = offset
+            offset += len(self.index.documents[filename]["sentences"])
+        for (filename, number), (idf, total) in scores.items():
+            sentences = self.index.documents[filename]["sentences"]
+            sentence = sentences[number][0]
+            position = offsets[filename] + number
+            if sentence not in ranked or -position > ranked[sentence][2]:
+                ranked[sentence] = (idf, total, -position)
+        answers = heapq.nlargest(n, ranked, key=ranked.get)
+
+        # Sentences without any query word follow with a score of zero
+        for filename in filenames:
+            for sentence, _ in self.index.documents[filename]["sentences"]:
+                if len(answers) >= n:
+                    return answers
+                if sentence not in ranked and sentence not in answers:
+                    answers.append(sentence)
+        return answers
+
+    def ask(self, question):
+        """
+        Returns the best answers to `question` and the seconds it took to
+        find them.
+        """
+        start = time.perf_counter()
+        query = set(tokenize(question))
+        filenames = self.index.top_files(query, n=FILE_MATCHES)
+        answers = self.top_sentences(query, filenames, n=SENTENCE_MATCHES)
+        return answers, time.perf_counter() - start
+
+
+def read(filename):
+    """Yields the questions in `filename`, one per non-empty line."""
+    with open(filename, encoding="utf8") as f:
+        for line in f:
+            if line.strip():
+                print(f"Query: {line.strip()}")
+                yield line.strip()
+
+
+def prompt():
+    """Yields questions typed by the user until the end of input."""
+    while True:
+        try:
+            question = input("Query: ").strip()
+        except EOFError:
+            print()
+            return
+        if question:
+            yield question
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python session.py corpus [queries.txt]")
+
+    start = time.perf_counter()
+    cache = os.path.normpath(sys.argv[1]) + ".tokens"
+    session = Session(InvertedIndex.update(sys.argv[1], Tokenizer(cache)))
+    print(f"Loaded {len(session.records)} files in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if len(sys.argv) == 3:
+        questions = read(sys.argv[2])
+    else:
+        questions = prompt()
+
+    latencies = []
+    for question in questions:
+        answers, elapsed = session.ask(question)
+        for answer in answers:
+            print(answer)
+        print(f"({elapsed * 1000:.2f} ms)")
+        latencies.append(elapsed)
+
+    if latencies:
+        latencies.sort()
+        print(f"{len(latencies)} queries, median "
+              f"{latencies[len(latencies) // 2] * 1000:.2f} ms, max "
+              f"{latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
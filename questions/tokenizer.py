@@ -0,0 +1,111 @@
+"""
+Tokenizer for questions.py.
+
+Stopwords and punctuation are loaded once into frozensets, files are
+tokenized across a pool of processes, and the tokens of each file can be
+cached on disk by a hash of its contents, so tokenizing an unchanged
+corpus again only reads the cache.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import string
+
+import nltk
+
+# Every token `word in string.punctuation` matched: any run of characters
+# of string.punctuation, and the empty string
+PUNCTUATION = frozenset(
+    string.punctuation[i:j]
+    for i in range(len(string.punctuation) + 1)
+    for j in range(i, len(string.punctuation) + 1)
+)
+
+# English stopwords, loaded on first use
+stopwords = None
+
+
+def tokenize(document):
+    """
+    Returns the lowercased words of `document` in order, without
+    punctuation or English stopwords.
+    """
+    global stopwords
+    if stopwords is None:
+        stopwords = frozenset(nltk.corpus.stopwords.words("english"))
+    return [word for word in nltk.word_tokenize(document.lower())
+            if word not in stopwords and word not in PUNCTUATION]
+
+
+def analyze(content):
+    """
+    Returns the words of a file's `content` and its sentences as
+    [sentence, tokens] pairs, splitting each line into sentences and
+    leaving out sentences without any words.
+    """
+    sentences = []
+    for passage in content.split("\n"):
+        for sentence in nltk.sent_tokenize(passage):
+            tokens = tokenize(sentence)
+            if tokens:
+                sentences.append([sentence, tokens])
+    return tokenize(content), sentences
+
+
+class Tokenizer():
+
+    def __init__(self, cache=None, workers=None):
+        """
+        Initialize a tokenizer caching tokens in directory `cache`, if
+        given, and using up to `workers` processes (by default one per CPU).
+        """
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        if cache is not None:
+            os.makedirs(cache, exist_ok=True)
+
+    def path(self, content):
+        """Returns the cache file for a file with `content`."""
+        digest = hashlib.sha256(content.encode("utf8")).hexdigest()
+        return os.path.join(self.cache, digest + ".json")
+
+    def analyze_files(self, files):
+        """
+        Given `files` mapping filenames to contents, returns a dictionary
+        mapping each filename to `analyze` of its contents.
+        """
+        results = dict()
+        pending = dict()
+        for filename, content in files.items():
+            if self.cache is not None:
+                try:
+                    with open(self.path(content), encoding="utf8") as f:
+                        results[filename] = tuple(json.load(f))
+                    continue
+                except (OSError, ValueError):
+                    pass
+            pending[filename] = content
+
+        # Tokenize files that were not cached, in parallel if worth it
+        if len(pending) > 1 and self.workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                min(self.workers, len(pending))
+            ) as executor:
+                analyses = executor.map(analyze, pending.values())
+                pending_results = dict(zip(pending, analyses))
+        else:
+            pending_results = {filename: analyze(content)
+                               for filename, content in pending.items()}
+
+        for filename, (words, sentences) in pending_results.items():
+            results[filename] = (words, sentences)
+            if self.cache is not None:
+                path = self.path(files[filename])
+                temporary = path + ".tmp"
+                with open(temporary, "w", encoding="utf8") as f:
+                    json.dump([words, sentences], f)
+                os.replace(temporary, path)
+
+        # Keep the order of `files`
+        return {filename: results[filename] for filename in files}
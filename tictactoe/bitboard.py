@@ -0,0 +1,119 @@
+"""
+Tic Tac Toe bitboards
+
+A state is a pair of 9-bit masks `(x, o)` of the cells taken by each
+player, where cell (i, j) is bit 3 * i + j.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Whether each mask contains a complete line, and how many cells it has
+WINNING = [any(mask & line == line for line in LINES) for mask in range(512)]
+COUNT = [bin(mask).count("1") for mask in range(512)]
+
+
+def encode(board):
+    """
+    Returns the state for a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(state):
+    """
+    Returns the list-of-lists board for a state.
+    """
+    x, o = state
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            row.append(X if x & bit else O if o & bit else EMPTY)
+        board.append(row)
+    return board
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return 0, 0
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = state
+    return X if COUNT[x] == COUNT[o] else O
+
+
+def actions(state):
+    """
+    Returns list of all possible actions (i, j) available on the board.
+    """
+    x, o = state
+    taken = x | o
+    return [(k // 3, k % 3) for k in range(9) if not taken >> k & 1]
+
+
+def result(state, action):
+    """
+    Returns the state that results from making move (i, j) on the board.
+    """
+    x, o = state
+    bit = 1 << (3 * action[0] + action[1])
+    if (x | o) & bit:
+        raise NameError('This action cannot be done')
+    return (x | bit, o) if COUNT[x] == COUNT[o] else (x, o | bit)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WINNING[x]:
+        return X
+    elif WINNING[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return WINNING[x] or WINNING[o] or x | o == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    if WINNING[x]:
+        return 1
+    elif WINNING[o]:
+        return -1
+    return 0
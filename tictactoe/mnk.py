@@ -0,0 +1,481 @@
+"""
+m,n,k-game engine
+
+Generalizes Tic Tac Toe to an m-row, n-column board where k in a row
+wins, e.g. 5x5 with 4 in a row or 15x15 gomoku. Boards are bitboards
+with one padding column per row, so lines never wrap between rows.
+"""
+import concurrent.futures
+import math
+import os
+import random
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won position; anything at least this large is a forced result
+WIN = 1000000
+
+
+class MNKGame():
+
+    def __init__(self, m=3, n=3, k=3):
+        """
+        Initialize an m-row, n-column game where `k` in a row wins.
+        A state is a pair of masks `(x, o)` of the cells taken by each
+        player, where cell (i, j) is bit i * (n + 1) + j.
+        """
+        if not 1 <= k <= max(m, n):
+            raise Exception("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.stride = n + 1
+
+        self.cells = 0
+        for i in range(m):
+            for j in range(n):
+                self.cells |= 1 << self.bit((i, j))
+
+        # Shifts between neighboring cells along each kind of line
+        self.directions = [1, self.stride, self.stride + 1, self.stride - 1]
+
+        # Masks of every k cells in a row, for the heuristic evaluation
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    if (0 <= i + (k - 1) * di < m
+                            and 0 <= j + (k - 1) * dj < n):
+                        self.windows.append(sum(
+                            1 << self.bit((i + d * di, j + d * dj))
+                            for d in range(k)
+                        ))
+
+        # Random keys for Zobrist hashing, one per player per cell
+        generator = random.Random(0)
+        self.zobrist = [
+            {bit: generator.getrandbits(64) for bit in range(m * self.stride)}
+            for player in (X, O)
+        ]
+
+    def bit(self, action):
+        """Returns the bit index of cell (i, j)."""
+        return action[0] * self.stride + action[1]
+
+    def cell(self, bit):
+        """Returns the cell (i, j) of a bit index."""
+        return divmod(bit, self.stride)
+
+    def encode(self, board):
+        """Returns the state for a list-of-lists board."""
+        x = o = 0
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] == X:
+                    x |= 1 << self.bit((i, j))
+                elif board[i][j] == O:
+                    o |= 1 << self.bit((i, j))
+        return x, o
+
+    def decode(self, state):
+        """Returns the list-of-lists board for a state."""
+        x, o = state
+        return [[X if x >> self.bit((i, j)) & 1
+                 else O if o >> self.bit((i, j)) & 1 else EMPTY
+                 for j in range(self.n)]
+                for i in range(self.m)]
+
+    def initial_state(self):
+        """Returns starting state of the board."""
+        return 0, 0
+
+    def player(self, state):
+        """Returns player who has the next turn on a board."""
+        x, o = state
+        return X if bin(x).count("1") == bin(o).count("1") else O
+
+    def actions(self, state):
+        """Returns set of all possible actions (i, j) available."""
+        x, o = state
+        empty = self.cells & ~(x | o)
+        return {self.cell(bit) for bit in bits(empty)}
+
+    def result(self, state, action):
+        """Returns the state that results from making move (i, j)."""
+        x, o = state
+        i, j = action
+        bit = 1 << self.bit(action)
+        if not (0 <= i < self.m and 0 <= j < self.n) or (x | o) & bit:
+            raise NameError('This action cannot be done')
+        return (x | bit, o) if self.player(state) == X else (x, o | bit)
+
+    def has_line(self, mask):
+        """Returns True if `mask` has k cells in a row."""
+        for d in self.directions:
+            line = mask
+            length = 1
+
+            # Double the run length checked at each step
+            while length < self.k and line:
+                step = min(length, self.k - length)
+                line &= line >> (d * step)
+                length += step
+            if line:
+                return True
+        return False
+
+    def winner(self, state):
+        """Returns the winner of the game, if there is one."""
+        x, o = state
+        if self.has_line(x):
+            return X
+        elif self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, state):
+        """Returns True if game is over, False otherwise."""
+        x, o = state
+        return self.winner(state) is not None or x | o == self.cells
+
+    def utility(self, state):
+        """Returns 1 if X has won the game, -1 if O has won, 0 otherwise."""
+        game_winner = self.winner(state)
+        if game_winner == X:
+            return 1
+        elif game_winner == O:
+            return -1
+        return 0
+
+    def evaluate(self, mine, theirs):
+        """
+        Returns a heuristic score for the player owning `mine`: every
+        window still open to one player counts for that player, more the
+        more of it they already hold.
+        """
+        score = 0
+        for window in self.windows:
+            if not window & theirs:
+                score += 4 ** bin(window & mine).count("1") - 1
+            elif not window & mine:
+                score -= 4 ** bin(window & theirs).count("1") - 1
+        return score
+
+    def near(self, stones, radius):
+        """Returns the mask of cells within `radius` of any stone."""
+        area = stones
+        for _ in range(radius):
+            area = (area | area << 1 | area >> 1) & self.cells
+            area = (area | area << self.stride | area >> self.stride)
+            area &= self.cells
+        return area
+
+
+def bits(mask):
+    """Yields the indices of the set bits of `mask`."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Timeout(Exception):
+    pass
+
+
+class Engine():
+
+    def __init__(self, game, time_limit=1.0, max_depth=None, radius=None):
+        """
+        Initialize an iterative-deepening alpha-beta engine for `game`.
+            - `time_limit`: seconds to spend on each move
+            - `max_depth`: deepest search, by default the whole game
+            - `radius`: only consider moves this close to a stone, or
+              every empty cell if None
+        The transposition table is kept between moves.
+        """
+        self.game = game
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.radius = radius
+        self.table = dict()
+        self.history = dict()
+        self.nodes = 0
+        self.depth = 0
+        self.elapsed = 0
+
+    def moves(self, mine, theirs, best=None):
+        """Returns the candidate moves, most promising first."""
+        game = self.game
+        taken = mine | theirs
+        empty = game.cells & ~taken
+        if self.radius is not None:
+            if taken:
+                empty &= game.near(taken, self.radius)
+            else:
+                empty = 1 << game.bit((game.m // 2, game.n // 2))
+        moves = sorted(bits(empty), key=lambda bit: -self.history.get(bit, 0))
+        if best is not None and best in moves:
+            moves.remove(best)
+            moves.insert(0, best)
+        return moves
+
+    def negamax(self, mine, theirs, turn, key, depth, alpha, beta):
+        """
+        Returns the value of the position for the player to move, who
+        owns `mine`, searching `depth` more moves with alpha-beta.
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+        game = self.game
+
+        # The player who just moved may have won; prefer quicker wins
+        if game.has_line(theirs):
+            return -WIN - depth
+        if mine | theirs == game.cells:
+            return 0
+        if depth == 0:
+            return game.evaluate(mine, theirs)
+
+        # Probe the transposition table
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, v, bound, best_move = entry
+            if entry_depth >= depth:
+                if bound == 0:
+                    return v
+                elif bound > 0:
+                    alpha = max(alpha, v)
+                else:
+                    beta = min(beta, v)
+                if alpha >= beta:
+                    return v
+
+        original_alpha = alpha
+        best = -math.inf
+        zobrist = game.zobrist[turn]
+        for bit in self.moves(mine, theirs, best_move):
+            v = -self.negamax(theirs, mine | 1 << bit, 1 - turn,
+                              key ^ zobrist[bit], depth - 1, -beta, -alpha)
+            if v > best:
+                best, best_move = v, bit
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                self.history[bit] = self.history.get(bit, 0) + depth * depth
+                break
+
+        bound = -1 if best <= original_alpha else 1 if best >= beta else 0
+        self.table[key] = (depth, best, bound, best_move)
+        return best
+
+    def best_move(self, state):
+        """
+        Returns the best action (i, j) found for the player to move in
+        `state` within the time limit, or None if the game is over.
+        """
+        if self.game.terminal(state):
+            return None
+        move, _ = self.search(state, self.time_limit)
+        return self.game.cell(move)
+
+    def search(self, state, time_limit, moves=None):
+        """
+        Searches `moves` (bit indices, by default every candidate move)
+        in `state` one move deeper at a time for `time_limit` seconds.
+        Returns the best move and its value at the deepest full depth, and
+        keeps the best move and value of every full depth in `results`.
+        """
+        game = self.game
+        start = time.perf_counter()
+        self.deadline = start + time_limit
+        self.nodes = 0
+        self.depth = 0
+        self.results = dict()
+
+        x, o = state
+        turn = 0 if game.player(state) == X else 1
+        mine, theirs = (x, o) if turn == 0 else (o, x)
+        key = 0
+        for player, mask in enumerate((x, o)):
+            for bit in bits(mask):
+                key ^= game.zobrist[player][bit]
+
+        if moves is None:
+            moves = self.moves(mine, theirs)
+        best_move, value = moves[0], -math.inf
+        empty = bin(game.cells & ~(x | o)).count("1")
+        max_depth = min(self.max_depth or empty, empty)
+
+        # Search one move deeper each time, keeping the last full result
+        for depth in range(1, max_depth + 1):
+            try:
+                best, choice = -math.inf, None
+                alpha = -math.inf
+                for bit in sorted(moves, key=lambda bit: (
+                    bit != best_move, -self.history.get(bit, 0)
+                )):
+                    v = -self.negamax(
+                        theirs, mine | 1 << bit, 1 - turn,
+                        key ^ game.zobrist[turn][bit],
+                        depth - 1, -math.inf, -alpha
+                    )
+                    if v > best:
+                        best, choice = v, bit
+                    alpha = max(alpha, v)
+            except Timeout:
+                break
+            best_move, value = choice, best
+            self.depth = depth
+            self.results[depth] = (best_move, value)
+            if abs(best) >= WIN:
+                break
+
+        self.elapsed = time.perf_counter() - start
+        return best_move, value
+
+
+class ParallelEngine():
+
+    def __init__(self, game, time_limit=1.0, workers=None, max_depth=None,
+                 radius=None):
+        """
+        Initialize an engine that splits the root moves of each search
+        between `workers` processes, by default one per CPU. Each worker
+        keeps its own Engine, and so its own transposition table, for the
+        whole game.
+        """
+        self.game = game
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.radius = radius
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            self.workers, initializer=start_worker,
+            initargs=(game.m, game.n, game.k, max_depth, radius)
+        )
+        self.statistics = []
+        self.nodes = 0
+        self.depth = 0
+        self.elapsed = 0
+
+    def best_move(self, state):
+        """
+        Returns the best action (i, j) found by the workers within the
+        time limit, or None if the game is over.
+        """
+        game = self.game
+        if game.terminal(state):
+            return None
+        start = time.perf_counter()
+        deadline = time.time() + self.time_limit
+
+        # Deal candidate moves out in order so every worker gets good ones
+        x, o = state
+        mine, theirs = (x, o) if game.player(state) == X else (o, x)
+        moves = Engine(game, radius=self.radius).moves(mine, theirs)
+        shares = [moves[i::self.workers] for i in range(self.workers)]
+        futures = [self.pool.submit(search_share, state, share, deadline)
+                   for share in shares if share]
+        self.statistics = [future.result() for future in futures]
+        self.nodes = sum(result["nodes"] for result in self.statistics)
+        self.elapsed = time.perf_counter() - start
+
+        # Heuristic values are only comparable at the same depth, so
+        # workers are compared at the deepest depth all of them finished.
+        # A worker that stopped on a proven win or loss has an exact value,
+        # which compares with any depth.
+        finished = [result for result in self.statistics if result["results"]]
+        if not finished:
+            self.depth = 0
+            return game.cell(self.statistics[0]["move"])
+        unproven = [result["depth"] for result in finished
+                    if abs(result["value"]) < WIN]
+        self.depth = min(unproven) if unproven else max(
+            result["depth"] for result in finished
+        )
+        candidates = [
+            (result["move"], result["value"]) if abs(result["value"]) >= WIN
+            else result["results"][self.depth]
+            for result in finished
+        ]
+        move, _ = max(candidates, key=lambda candidate: candidate[1])
+        return game.cell(move)
+
+    def close(self):
+        """Stops the worker processes."""
+        self.pool.shutdown()
+
+
+# Engine of each worker process
+worker_engine = None
+
+
+def start_worker(m, n, k, max_depth, radius):
+    """Creates the engine for a worker process."""
+    global worker_engine
+    worker_engine = Engine(MNKGame(m, n, k), max_depth=max_depth,
+                           radius=radius)
+
+
+def search_share(state, moves, deadline):
+    """Searches a worker's share of the root moves until `deadline`."""
+    move, value = worker_engine.search(state, deadline - time.time(), moves)
+    return {
+        "worker": os.getpid(),
+        "move": move,
+        "value": value,
+        "depth": worker_engine.depth,
+        "results": worker_engine.results,
+        "nodes": worker_engine.nodes,
+        "elapsed": worker_engine.elapsed
+    }
+
+
+def benchmark(m, n, k, time_limit=1.0, moves=6, radius=None, workers=None):
+    """
+    Plays the first `moves` moves of a self-play game, printing the depth
+    reached and search speed of each move. With `workers`, root moves
+    are searched in parallel and per-worker node counts are printed too.
+    """
+    game = MNKGame(m, n, k)
+    if workers:
+        engine = ParallelEngine(game, time_limit=time_limit,
+                                workers=workers, radius=radius)
+    else:
+        engine = Engine(game, time_limit=time_limit, radius=radius)
+    state = game.initial_state()
+    total_nodes = total_time = 0
+    for _ in range(moves):
+        if game.terminal(state):
+            break
+        player = game.player(state)
+        action = engine.best_move(state)
+        state = game.result(state, action)
+        total_nodes += engine.nodes
+        total_time += engine.elapsed
+        print(f"{player} plays {action}: "
+              f"depth {engine.depth}, {engine.nodes} nodes, "
+              f"{engine.nodes / max(engine.elapsed, 1e-9):.0f} nodes/s")
+        if workers:
+            for result in engine.statistics:
+                print(f"    worker {result['worker']}: "
+                      f"depth {result['depth']}, {result['nodes']} nodes")
+    if workers:
+        engine.close()
+    print(f"{m}x{n}, {k} in a row: {total_nodes} nodes in "
+          f"{total_time:.2f}s, {total_nodes / max(total_time, 1e-9):.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [4, 5, 6]:
+        sys.exit("Usage: python mnk.py m n k [seconds] [workers]")
+    m, n, k = (int(arg) for arg in sys.argv[1:4])
+    time_limit = float(sys.argv[4]) if len(sys.argv) >= 5 else 1.0
+    workers = int(sys.argv[5]) if len(sys.argv) == 6 else None
+    benchmark(m, n, k, time_limit, radius=None if m * n <= 36 else 2,
+              workers=workers)
@@ -1,3 +1,4 @@
+import concurrent.futures
 import pygame
 import sys
 import time
@@ -20,7 +21,40 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI searches in a background thread so the window stays responsive
+executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+ai_move = None
+ai_started = None
+replies = dict()
+clock = pygame.time.Clock()
+
+
+def ponder(board):
+    """
+    Starts computing the AI's reply to every move the user can make, so
+    the reply is ready as soon as the user moves.
+    """
+    replies = dict()
+    if ttt.terminal(board):
+        return replies
+    for action in ttt.actions(board):
+        next_board = ttt.result(board, action)
+        if not ttt.terminal(next_board):
+            key = tuple(tuple(row) for row in next_board)
+            replies[key] = executor.submit(ttt.minimax, next_board)
+    return replies
+
+
+def cancel(futures):
+    """
+    Cancels searches that are no longer needed, so they do not hold up
+    the worker thread. Searches already running are left to finish.
+    """
+    for future in futures:
+        if future is not None:
+            future.cancel()
+
 
 while True:
 
@@ -61,6 +95,7 @@ while True:
             if playXButton.collidepoint(mouse):
                 time.sleep(0.2)
                 user = ttt.X
+                replies = ponder(board)
             elif playOButton.collidepoint(mouse):
                 time.sleep(0.2)
                 user = ttt.O
@@ -109,15 +144,20 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, without waiting for the search to finish
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                key = tuple(tuple(row) for row in board)
+                ai_move = replies.pop(key, None)
+                cancel(replies.values())
+                replies = dict()
+                if ai_move is None:
+                    ai_move = executor.submit(ttt.minimax, board)
+                ai_started = time.time()
+            elif ai_move.done() and time.time() - ai_started >= 0.5:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
+                replies = ponder(board)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -142,6 +182,9 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    cancel([ai_move, *replies.values()])
+                    ai_move = None
+                    replies = dict()
 
     pygame.display.flip()
+    clock.tick(60)
@@ -0,0 +1,111 @@
+"""
+Tic Tac Toe tablebase
+
+Stores the optimal move and value of every reachable position, one byte
+per position, indexed by the base-3 encoding of the board. Run
+`python tablebase.py` to write the file used by `tictactoe.minimax`.
+"""
+import mmap
+import os
+import sys
+
+import bitboard
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "tablebase.bin")
+
+SIZE = 3 ** 9
+UNREACHABLE = 0xFF
+NO_MOVE = 0x0F
+
+# Base-3 index contribution of each 9-bit mask of X cells
+TERNARY = [sum(3 ** k for k in range(9) if mask >> k & 1)
+           for mask in range(512)]
+
+# Memory-mapped tablebases, by filename
+tables = dict()
+
+
+def index(state):
+    """
+    Returns the position of the state in the tablebase.
+    """
+    x, o = state
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def solve(state, entries):
+    """
+    Returns the minimax value of the state, storing an entry for it and
+    every position reachable from it in `entries`.
+    """
+    i = index(state)
+    if entries[i] != UNREACHABLE:
+        return (entries[i] >> 4) - 1
+
+    if bitboard.terminal(state):
+        best_move, best = NO_MOVE, bitboard.utility(state)
+    else:
+        maximizing = bitboard.player(state) == bitboard.X
+        best_move, best = None, None
+        x, o = state
+        for k in range(9):
+            if (x | o) >> k & 1:
+                continue
+            v = solve(bitboard.result(state, (k // 3, k % 3)), entries)
+            if best is None or (v > best if maximizing else v < best):
+                best_move, best = k, v
+
+    entries[i] = (best + 1) << 4 | best_move
+    return best
+
+
+def generate(filename=FILENAME):
+    """
+    Writes the tablebase for every position reachable from the start.
+    """
+    entries = bytearray([UNREACHABLE]) * SIZE
+    solve(bitboard.initial_state(), entries)
+    with open(filename, "wb") as f:
+        f.write(entries)
+    return sum(entry != UNREACHABLE for entry in entries)
+
+
+def load(filename=FILENAME):
+    """
+    Returns the memory-mapped tablebase, or None if it does not exist.
+    The file is only opened the first time it is needed.
+    """
+    if filename not in tables:
+        try:
+            with open(filename, "rb") as f:
+                tables[filename] = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (OSError, ValueError):
+            tables[filename] = None
+    return tables[filename]
+
+
+def lookup(state, filename=FILENAME):
+    """
+    Returns `(action, value)` for the state, where `action` is None on a
+    terminal board, or None if the state is not in a tablebase.
+    """
+    table = load(filename)
+    if table is None or len(table) != SIZE:
+        return None
+    entry = table[index(state)]
+    if entry == UNREACHABLE:
+        return None
+    move = entry & 0x0F
+    action = None if move == NO_MOVE else (move // 3, move % 3)
+    return action, (entry >> 4) - 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python tablebase.py [tablebase.bin]")
+    filename = sys.argv[1] if len(sys.argv) == 2 else FILENAME
+    count = generate(filename)
+    print(f"Wrote {count} positions to {filename}")
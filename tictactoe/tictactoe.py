@@ -1,9 +1,11 @@
 """
 Tic Tac Toe Player
 """
-import copy
 import math
 
+import bitboard
+import tablebase
+
 X = "X"
 O = "O"
 EMPTY = None
@@ -22,10 +24,7 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    empty_blocks = empty_blocks_count(board)
-
-    player_str = "X" if empty_blocks == len(board) * len(board[0]) else "X" if empty_blocks % 2 != 0 else "O"
-    return player_str
+    return bitboard.player(bitboard.encode(board))
 
 
 def actions(board):
@@ -48,7 +47,7 @@ def result(board, action):
     if board[action[0]][action[1]] != EMPTY:
         raise NameError('This action cannot be done')
 
-    board_copy = copy.deepcopy(board)
+    board_copy = [row.copy() for row in board]
     board_copy[action[0]][action[1]] = player(board)
     return board_copy
 
@@ -57,128 +56,150 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-
-    # checking each row
-    for i in range(len(board)):
-        if not has_empty_block(board[i]):
-            row_as_string = "".join(board[i])
-            if row_as_string.count("X") == 3:
-                return "X"
-            elif row_as_string.count("O") == 3:
-                return "O"
-
-    # checking each column
-    for j in range(len(board[0])):
-        col_as_string = ""
-        for k in range(len(board)):
-            if board[k][j] != EMPTY:
-                col_as_string+= str(board[k][j])
-                print(col_as_string)
-        if col_as_string.count("X") == 3:
-            return "X"
-        elif col_as_string.count("O") == 3:
-            return "O"
-
-    # checking diagonal 1
-    dia1 = [board[0][0], board[1][1], board[2][2]]
-    dia1_as_string = ""
-    if not has_empty_block(dia1):
-        dia1_as_string = "".join(dia1)
-    if dia1_as_string.count("X") == 3:
-        return "X"
-    if dia1_as_string.count("O") == 3:
-        return "O"
-
-    # checking diagonal 1
-    dia2 = [board[0][2], board[1][1], board[2][0]]
-    dia2_as_string = ""
-    if not has_empty_block(dia2):
-        dia2_as_string = "".join(dia2)
-    if dia2_as_string.count("X") == 3:
-        return "X"
-    if dia2_as_string.count("O") == 3:
-        return "O"
-
-    return None
-
-
-def empty_blocks_count(board):
-    empty_blocks = 0
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == EMPTY:
-                empty_blocks += 1
-    return empty_blocks
-
-
-def has_empty_block(row):
-    for i in range(len(row)):
-        if row[i] == EMPTY:
-            return True
-    return False
+    return bitboard.winner(bitboard.encode(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
-        return True
-
-    elif empty_blocks_count(board) == 0:
-        return True
-
-    else:
-        return False
+    return bitboard.terminal(bitboard.encode(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    game_winner = winner(board)
-    if "X" == game_winner:
-        return 1
-    elif "O" == game_winner:
-        return -1
-    else:
-        return 0
+    return bitboard.utility(bitboard.encode(board))
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    if terminal(board):
+    state = bitboard.encode(board)
+    if bitboard.terminal(state):
         return None
 
-    if player(board) == "X":
-        action, v= MAX_value(board)
-        return action
+    statistics["nodes"] = 1
+    statistics["table_hits"] = 0
+
+    # Answer from the tablebase when one has been generated
+    if use_tablebase:
+        entry = tablebase.lookup(state)
+        if entry is not None:
+            return entry[0]
+
+    maximizing = bitboard.player(state) == X
+    alpha, beta = -math.inf, math.inf
+    best_action = None
+    for action in ordered_actions(state):
+        v = value(bitboard.result(state, action), alpha, beta)
+        if maximizing and v > alpha:
+            best_action, alpha = action, v
+        elif not maximizing and v < beta:
+            best_action, beta = action, v
+
+        # Nothing beats a win
+        if alpha >= 1 or beta <= -1:
+            break
+    return best_action
+
+
+# Whether minimax looks moves up in the tablebase before searching
+use_tablebase = True
+
+# Counters for the last call to minimax
+statistics = {"nodes": 0, "table_hits": 0}
+
+# Maps canonical states to (value, bound) from previous searches
+transpositions = dict()
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Cells tried first: center, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Cell orders of the 8 rotations and reflections of the board
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],
+    [8, 5, 2, 7, 4, 1, 6, 3, 0]
+]
+
+# Each symmetry applied to every 9-bit mask
+TRANSFORMS = [
+    [sum(1 << k for k in range(9) if mask >> symmetry[k] & 1)
+     for mask in range(512)]
+    for symmetry in SYMMETRIES
+]
+
+
+def ordered_actions(state):
+    """
+    Returns the available actions in the state, most promising first.
+    """
+    x, o = state
+    taken = x | o
+    return [(i, j) for i, j in MOVE_ORDER if not taken >> (3 * i + j) & 1]
+
+
+def canonical(state):
+    """
+    Returns an integer encoding of the state that is the same for all
+    states equal to it up to rotation and reflection.
+    """
+    x, o = state
+    return min(transform[x] | transform[o] << 9 for transform in TRANSFORMS)
+
+
+def value(state, alpha, beta):
+    """
+    Returns the minimax value of the state, searching with alpha-beta
+    pruning. Values outside (alpha, beta) are only bounds on the value.
+    """
+    statistics["nodes"] += 1
+    if bitboard.terminal(state):
+        return bitboard.utility(state)
+
+    # Reuse what earlier searches found about this position
+    key = canonical(state)
+    if key in transpositions:
+        v, bound = transpositions[key]
+        if bound == EXACT:
+            statistics["table_hits"] += 1
+            return v
+        elif bound == LOWER:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+        if alpha >= beta:
+            statistics["table_hits"] += 1
+            return v
+
+    original_alpha, original_beta = alpha, beta
+    maximizing = bitboard.player(state) == X
+    best = -math.inf if maximizing else math.inf
+    for action in ordered_actions(state):
+        v = value(bitboard.result(state, action), alpha, beta)
+        if maximizing:
+            best = max(best, v)
+            alpha = max(alpha, best)
+        else:
+            best = min(best, v)
+            beta = min(beta, best)
+        if alpha >= beta:
+            break
+
+    if best <= original_alpha:
+        transpositions[key] = (best, UPPER)
+    elif best >= original_beta:
+        transpositions[key] = (best, LOWER)
     else:
-        action, v = MIN_value(board)
-        return action
-
-
-def MAX_value(board):
-    if terminal(board):
-        return None, utility(board)
-    max_action, max_value = None, -100000000000
-    for action in actions(board):
-        empty, v= MIN_value(result(board, action))
-        if v>max_value:
-            max_value=v
-            max_action=action
-    return max_action, max_value
-
-
-def MIN_value(board):
-    if terminal(board):
-        return None, utility(board)
-    min_action, min_value = None, 100000000000
-    for action in actions(board):
-        empty, v= MAX_value(result(board, action))
-        if v<min_value:
-            min_value=v
-            min_action=action
-    return min_action, min_value
+        transpositions[key] = (best, EXACT)
+    return best